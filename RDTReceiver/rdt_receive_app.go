@@ -3,6 +3,7 @@ package main
 import (
 	"RDTReceiver/rdt_receiver"
 	"flag"
+	"fmt"
 	"net"
 	"os"
 )
@@ -19,15 +20,37 @@ func main() {
 	remotePort := flag.Int("backward_recv_port", 23241, "DP port number used by the link emulator to receive ACKs from the receiver")
 	localPort := flag.Int("receiver_recv_port", 37898, "UDP port number used by the receiver to receive data from the emulator")
 	filename := flag.String("file", "fileReceived.txt", "name of the file into which the received data is written")
+	ringSize := flag.Int("ring_size", rdt_receiver.DefaultRingSize, "number of sequence numbers, must match the sender")
+	windowSize := flag.Int("window_size", rdt_receiver.DefaultWindowSize, "window size, must match the sender")
+	fileOffset := flag.Int64("file_offset", -1, "write the data received from this byte offset of the file, "+
+		"without truncating it, for one range of a striped transfer")
+	fileSize := flag.Int64("file_size", -1, "with -file_offset, the size of the whole file, "+
+		"to which the file is truncated or extended")
+	resume := flag.Bool("resume", false, "continue after the bytes delivered by an earlier run, "+
+		"as recorded in the checkpoint next to the file, if the sender asks to resume")
 
 	flag.Parse()
 
 	builder := rdt_receiver.Builder{}
-	receiver := builder.
+	builder.
 		SetRemoteAddress(*remoteIP, *remotePort).
 		SetLocalAddress("", *localPort). // listen to all local IPs
-		SetFileReceived(*filename).
-		GetReceiver()
+		SetWindow(*ringSize, *windowSize)
+	// one checkpoint per range of a striped transfer
+	checkpointFilename := *filename + ".checkpoint"
+	if *fileOffset >= 0 {
+		builder.SetFileReceivedAt(*filename, *fileOffset)
+		if *fileSize >= 0 {
+			builder.SetFileSize(*fileSize)
+		}
+		checkpointFilename = fmt.Sprintf("%s.%d.checkpoint", *filename, *fileOffset)
+	} else if *resume {
+		builder.KeepFileReceived(*filename)
+	} else {
+		builder.SetFileReceived(*filename)
+	}
+	builder.SetCheckpoint(checkpointFilename, *resume)
+	receiver := builder.GetReceiver()
 
 	receiver.Start()
 
@@ -8,31 +8,31 @@ const (
 	SACK = 0
 	DATA = 1
 	EOT  = 2
+	// RESUME from the sender asks for the bytes already delivered by an earlier run,
+	// the RESUME in reply carries their number and CRC-32 as an 8-byte and a 4-byte big-endian integer
+	RESUME = 3
+	// set in the flag of the DATA packets when their payloads are the consecutive bytes of a zlib stream
+	CompressedFlag = 0x10
 )
 
+const ResumeOfferBytesLen = 12
+
+const HeaderBytesLen = 12
+
 type Packet struct {
-	flag    uint32 // the type of packet, 0 = ACK, 1 = data, 2 = EOT
+	flag    uint32 // the type of packet, 0 = ACK, 1 = data, 2 = EOT, 3 = RESUME
 	seqNum  SeqNum
-	length  uint32 // the length of characters in data AT MOST 500
-	payload string
+	length  uint32 // the length of bytes in data AT MOST 500
+	payload string // raw bytes, not necessarily text
 }
 
 func encode(packet Packet) []byte {
 	// Use Big Endian to conform with the network byte order
-	flagBytes := make([]byte, 4)
-	binary.BigEndian.PutUint32(flagBytes, packet.flag)
-
-	seqNumBytes := make([]byte, 4)
-	binary.BigEndian.PutUint32(seqNumBytes, uint32(packet.seqNum))
-
-	lengthBytes := make([]byte, 4)
-	binary.BigEndian.PutUint32(lengthBytes, packet.length)
-
-	payloadBytes := []byte(packet.payload)
-
-	header := append(flagBytes, seqNumBytes...)
-	header = append(header, lengthBytes...)
-	packetEncoded := append(header, payloadBytes...)
+	packetEncoded := make([]byte, HeaderBytesLen+len(packet.payload))
+	binary.BigEndian.PutUint32(packetEncoded[0:4], packet.flag)
+	binary.BigEndian.PutUint32(packetEncoded[4:8], uint32(packet.seqNum))
+	binary.BigEndian.PutUint32(packetEncoded[8:12], packet.length)
+	copy(packetEncoded[HeaderBytesLen:], packet.payload)
 	return packetEncoded
 }
 
@@ -47,7 +47,12 @@ func decode(buffer []byte) Packet {
 	lengthBytes := buffer[8:12]
 	packet.length = binary.BigEndian.Uint32(lengthBytes)
 
-	packet.payload = string(buffer[12:])
+	// the payload is raw bytes; only the first length bytes after the header belong to it
+	payloadEnd := len(buffer)
+	if int(packet.length) < payloadEnd-HeaderBytesLen {
+		payloadEnd = HeaderBytesLen + int(packet.length)
+	}
+	packet.payload = string(buffer[HeaderBytesLen:payloadEnd])
 
 	return packet
 }
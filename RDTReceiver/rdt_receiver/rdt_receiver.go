@@ -1,6 +1,9 @@
 package rdt_receiver
 
 import (
+	"compress/zlib"
+	"encoding/binary"
+	"io"
 	"log"
 	"net"
 	"os"
@@ -8,8 +11,8 @@ import (
 )
 
 const (
-	PacketBytesLen = 512
-	WindowSize     = 10
+	PacketBytesLen     = 512
+	CheckpointBytesLen = 8
 )
 
 type RDTReceiver struct {
@@ -17,11 +20,24 @@ type RDTReceiver struct {
 	localAddr      *net.UDPAddr
 	udpSocket      *net.UDPConn
 	fileReceived   *os.File
+	fileStart      int64 // offset of the first byte of this transfer in fileReceived
+	striped        bool  // other receivers write the rest of fileReceived, which must not be truncated
+	checkpointFile *os.File
+	// payload bytes delivered by this run and the earlier ones, as recorded in checkpointFile;
+	// with compression, bytes of the zlib stream rather than of the file
+	deliveredBytes int64
+	resumableBytes int64          // delivered by the earlier run, still in fileReceived
+	resumeOffer    string         // payload of the RESUME reply
+	startChosen    bool           // the transfer starts after the resumable bytes or from fileStart
+	decompressor   *io.PipeWriter // the payloads go through it once a compressed packet arrived
+	decompressed   chan error     // the end of the decompression
 	arrivalLogger  *log.Logger
 	arrivalLogFile *os.File
 	globalQuit     chan interface{}
 	waitGroup      *sync.WaitGroup
 	receiveBase    SeqNum
+	ringSize       int
+	windowSize     int
 	payloadBuffer  map[SeqNum]string
 	mutex          sync.Mutex
 }
@@ -46,34 +62,26 @@ func (receiver *RDTReceiver) Start() {
 }
 
 func (receiver *RDTReceiver) stop() {
+	if receiver.decompressor != nil {
+		receiver.decompressor.Close()
+		checkErr(<-receiver.decompressed)
+	}
 	receiver.fileReceived.Close()
 	receiver.arrivalLogFile.Close()
+	// the transfer is complete, there is nothing left to resume
+	receiver.checkpointFile.Close()
+	_ = os.Remove(receiver.checkpointFile.Name())
 }
 
 func (receiver *RDTReceiver) isPacketInCurrentWindow(packetSeqNum SeqNum) bool {
-	var currentWindowEnd SeqNum
-
-	if receiver.receiveBase <= RingSize-WindowSize {
-		// base <= 22; No ring
-		currentWindowEnd = SeqNum(receiver.receiveBase + WindowSize - 1)
-		return packetSeqNum >= receiver.receiveBase && packetSeqNum <= currentWindowEnd
-	} else {
-		currentWindowEnd = SeqNum(WindowSize - (RingSize - receiver.receiveBase) - 1)
-		return packetSeqNum >= receiver.receiveBase || packetSeqNum <= currentWindowEnd
-	}
+	// [receiveBase, receiveBase + windowSize - 1] along the ring
+	return receiver.receiveBase.GetRingDistance(packetSeqNum, receiver.ringSize) < receiver.windowSize
 }
 
 func (receiver *RDTReceiver) isPacketInPreviousWindow(packetSeqNum SeqNum) bool {
-	var previousWindowStart SeqNum
-	if receiver.receiveBase >= WindowSize {
-		// base >= 10; No ring
-		previousWindowStart = SeqNum(receiver.receiveBase - WindowSize)
-		return packetSeqNum >= previousWindowStart && packetSeqNum < receiver.receiveBase
-	} else {
-		// packetSeqNum < 10; hit the ring
-		previousWindowStart = SeqNum(RingSize - (WindowSize - receiver.receiveBase))
-		return packetSeqNum < receiver.receiveBase || packetSeqNum >= previousWindowStart
-	}
+	// [receiveBase - windowSize, receiveBase - 1] along the ring
+	distance := packetSeqNum.GetRingDistance(receiver.receiveBase, receiver.ringSize)
+	return distance >= 1 && distance <= receiver.windowSize
 }
 
 func (receiver *RDTReceiver) processReceivedBytes(byteLen int, buff []byte) {
@@ -82,8 +90,13 @@ func (receiver *RDTReceiver) processReceivedBytes(byteLen int, buff []byte) {
 
 	packet := decode(buff[:byteLen])
 	log.Println(packet)
-	if packet.flag == DATA {
+	if packet.flag&^CompressedFlag == DATA {
 		receiver.mutex.Lock()
+		// a sender that did not ask to resume sends the whole file
+		receiver.chooseStart(false)
+		if packet.flag&CompressedFlag != 0 && receiver.decompressor == nil {
+			receiver.startDecompression()
+		}
 		// received a data packet
 		// Log arrival
 		receiver.arrivalLogger.Println(packet.seqNum)
@@ -119,6 +132,11 @@ func (receiver *RDTReceiver) processReceivedBytes(byteLen int, buff []byte) {
 		}
 		receiver.mutex.Unlock()
 
+	} else if packet.flag == RESUME {
+		receiver.mutex.Lock()
+		receiver.chooseStart(true)
+		receiver.sendResumeOffer()
+		receiver.mutex.Unlock()
 	} else if packet.flag == EOT && packet.length == 0 {
 		// log arrival
 		receiver.arrivalLogger.Println("EOT")
@@ -144,16 +162,70 @@ func (receiver *RDTReceiver) slideWindow() {
 		// remove the packet from the buffer
 		delete(receiver.payloadBuffer, receiver.receiveBase)
 		receiver.deliverPayloadToApplication(payload)
-		receiver.receiveBase = receiver.receiveBase.Next()
+		receiver.receiveBase = receiver.receiveBase.Next(receiver.ringSize)
 		payload, presence = receiver.payloadBuffer[receiver.receiveBase]
 	}
+	receiver.writeCheckpoint()
+}
+
+func (receiver *RDTReceiver) chooseStart(resume bool) {
+	// Once, on the first RESUME or data packet: the bytes of the earlier run are kept only for a sender asking to
+	// resume, and the checkpoint is kept until then
+	if receiver.startChosen {
+		return
+	}
+	receiver.startChosen = true
+	if !resume {
+		receiver.resumableBytes = 0
+		receiver.resumeOffer = encodeResumeOffer(0, 0)
+	}
+	receiver.deliveredBytes = receiver.resumableBytes
+	start := receiver.fileStart + receiver.deliveredBytes
+	if !receiver.striped {
+		// nothing of an older, longer file is left after the transfer
+		checkErr(receiver.fileReceived.Truncate(start))
+	}
+	_, err := receiver.fileReceived.Seek(start, io.SeekStart)
+	checkErr(err)
+	checkErr(receiver.checkpointFile.Truncate(CheckpointBytesLen))
+	receiver.writeCheckpoint()
+}
+
+func (receiver *RDTReceiver) writeCheckpoint() {
+	// rewritten in place, the checkpoint is always one 8-byte big-endian integer
+	checkpoint := make([]byte, CheckpointBytesLen)
+	binary.BigEndian.PutUint64(checkpoint, uint64(receiver.deliveredBytes))
+	_, err := receiver.checkpointFile.WriteAt(checkpoint, 0)
+	checkErr(err)
+	_ = receiver.checkpointFile.Sync()
+}
+
+func (receiver *RDTReceiver) startDecompression() {
+	// the file is written by a goroutine reading the zlib stream from a pipe, as the payloads are delivered
+	reader, writer := io.Pipe()
+	receiver.decompressor = writer
+	receiver.decompressed = make(chan error, 1)
+	go func() {
+		decompressor, err := zlib.NewReader(reader)
+		if err == nil {
+			_, err = io.Copy(receiver.fileReceived, decompressor)
+		}
+		reader.CloseWithError(err) // a corrupt stream fails the next delivery
+		receiver.decompressed <- err
+	}()
 }
 
 func (receiver *RDTReceiver) deliverPayloadToApplication(payload string) {
 	// TODO: error handling
-	_, err := receiver.fileReceived.WriteString(payload)
+	var err error
+	if receiver.decompressor != nil {
+		_, err = io.WriteString(receiver.decompressor, payload)
+	} else {
+		_, err = receiver.fileReceived.WriteString(payload)
+	}
 	checkErr(err)
 	_ = receiver.fileReceived.Sync()
+	receiver.deliveredBytes += int64(len(payload))
 }
 
 func (receiver *RDTReceiver) sendAck(seqNum SeqNum) {
@@ -166,6 +238,23 @@ func (receiver *RDTReceiver) sendAck(seqNum SeqNum) {
 	receiver.sendPacket(&ackPacket)
 }
 
+func encodeResumeOffer(delivered int64, checksum uint32) string {
+	resumeOffer := make([]byte, ResumeOfferBytesLen)
+	binary.BigEndian.PutUint64(resumeOffer[0:8], uint64(delivered))
+	binary.BigEndian.PutUint32(resumeOffer[8:12], checksum)
+	return string(resumeOffer)
+}
+
+func (receiver *RDTReceiver) sendResumeOffer() {
+	resumePacket := Packet{
+		flag:    RESUME,
+		seqNum:  0,
+		length:  ResumeOfferBytesLen,
+		payload: receiver.resumeOffer,
+	}
+	receiver.sendPacket(&resumePacket)
+}
+
 func (receiver *RDTReceiver) sendEOT() {
 	EOTPacket := Packet{
 		flag:    EOT,
@@ -1,6 +1,9 @@
 package rdt_receiver
 
 import (
+	"encoding/binary"
+	"hash/crc32"
+	"io"
 	"log"
 	"net"
 	"os"
@@ -11,6 +14,11 @@ type BuildProcess interface {
 	SetRemoteAddress(remoteIP string, remotePort int) BuildProcess
 	SetLocalAddress(localIP string, localPort int) BuildProcess
 	SetFileReceived(filename string) BuildProcess
+	SetFileReceivedAt(filename string, offset int64) BuildProcess
+	SetFileSize(size int64) BuildProcess
+	KeepFileReceived(filename string) BuildProcess
+	SetCheckpoint(filename string, resume bool) BuildProcess
+	SetWindow(ringSize int, windowSize int) BuildProcess
 	setUdpSocket() BuildProcess
 	setUpLogger() BuildProcess
 	setMisc() BuildProcess
@@ -21,12 +29,26 @@ type Builder struct {
 	receiver RDTReceiver
 }
 
+func (b *Builder) SetWindow(ringSize int, windowSize int) BuildProcess {
+	// Selective repeat needs the window to be at most half of the sequence space
+	if windowSize < 1 || windowSize > ringSize/2 {
+		log.Fatalf("Window size: %d should be between 1 and half of Ring Size: %d", windowSize, ringSize)
+	}
+	b.receiver.ringSize = ringSize
+	b.receiver.windowSize = windowSize
+	return b
+}
+
 func (b *Builder) setMisc() BuildProcess {
 	b.receiver.globalQuit = make(chan interface{})
 	b.receiver.waitGroup = &sync.WaitGroup{}
 	b.receiver.receiveBase = SeqNum(0) // expected for the first packet
 	b.receiver.payloadBuffer = make(map[SeqNum]string)
 	b.receiver.mutex = sync.Mutex{}
+	if b.receiver.ringSize == 0 {
+		b.receiver.ringSize = DefaultRingSize
+		b.receiver.windowSize = DefaultWindowSize
+	}
 	return b
 }
 
@@ -74,6 +96,65 @@ func (b *Builder) SetFileReceived(filename string) BuildProcess {
 	return b
 }
 
+func (b *Builder) SetFileReceivedAt(filename string, offset int64) BuildProcess {
+	// one range of a striped transfer: the other receivers write the rest of the same file,
+	// so it is neither removed nor truncated
+	file, err := os.OpenFile(filename, os.O_RDWR|os.O_CREATE, 0644)
+	checkErr(err)
+	_, err = file.Seek(offset, io.SeekStart)
+	checkErr(err)
+	b.receiver.fileReceived = file
+	b.receiver.fileStart = offset
+	b.receiver.striped = true
+	return b
+}
+
+func (b *Builder) SetFileSize(size int64) BuildProcess {
+	// the size of the whole file of a striped transfer: every receiver sets the same size,
+	// which drops the tail of an older, longer file but none of the ranges already written
+	if !b.receiver.striped {
+		panic("SetFileSize can be called only after SetFileReceivedAt")
+	}
+	checkErr(b.receiver.fileReceived.Truncate(size))
+	return b
+}
+
+func (b *Builder) KeepFileReceived(filename string) BuildProcess {
+	// the file of an earlier run, for -resume: it is truncated once the sender has chosen to resume or not
+	file, err := os.OpenFile(filename, os.O_RDWR|os.O_CREATE, 0644)
+	checkErr(err)
+	b.receiver.fileReceived = file
+	return b
+}
+
+func (b *Builder) SetCheckpoint(filename string, resume bool) BuildProcess {
+	// With resume, the bytes delivered by the earlier run are offered to a sender asking to resume,
+	// which checks them against its own file with their CRC-32.
+	// The file received must be set first, and must not have been removed for resume.
+	// Nothing is written before the first RESUME or data packet, see chooseStart.
+	if b.receiver.fileReceived == nil {
+		panic("SetCheckpoint can be called only after SetFileReceived, SetFileReceivedAt or KeepFileReceived")
+	}
+	var delivered int64
+	if resume {
+		checkpoint, err := os.ReadFile(filename)
+		if err == nil && len(checkpoint) == CheckpointBytesLen {
+			delivered = int64(binary.BigEndian.Uint64(checkpoint))
+		}
+	}
+	// only the bytes still in the file count, in case it was cut after the checkpoint
+	checksum := crc32.NewIEEE()
+	delivered, err := io.Copy(checksum, io.NewSectionReader(b.receiver.fileReceived, b.receiver.fileStart, delivered))
+	checkErr(err)
+	b.receiver.resumableBytes = delivered
+	b.receiver.resumeOffer = encodeResumeOffer(delivered, checksum.Sum32())
+
+	checkpointFile, err := os.OpenFile(filename, os.O_RDWR|os.O_CREATE, 0644)
+	checkErr(err)
+	b.receiver.checkpointFile = checkpointFile
+	return b
+}
+
 func (b *Builder) setUdpSocket() BuildProcess {
 	if b.receiver.localAddr == nil || b.receiver.remoteAddr == nil {
 		panic("SetUdpSocket can be called only after SetRemoteAddress and SetLocalAddress")
@@ -87,6 +168,9 @@ func (b *Builder) setUdpSocket() BuildProcess {
 }
 
 func (b *Builder) GetReceiver() RDTReceiver {
+	if b.receiver.checkpointFile == nil {
+		panic("GetReceiver can be called only after SetCheckpoint")
+	}
 	b.setUpLogger().
 		setUdpSocket().
 		setMisc()
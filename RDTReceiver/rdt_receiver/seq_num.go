@@ -1,29 +1,32 @@
 package rdt_receiver
 
-const RingSize = 32
+const (
+	DefaultRingSize   = 32
+	DefaultWindowSize = 10
+)
 
 /*
-The SeqNum can only be a integer between [0, 31]
+The SeqNum can only be a integer between [0, ringSize - 1]
 */
 type SeqNum uint32
 
-func (seqNum SeqNum) Next() SeqNum {
-	if seqNum == 31 {
+func (seqNum SeqNum) Next(ringSize int) SeqNum {
+	if int(seqNum) == ringSize-1 {
 		return SeqNum(0)
 	}
 	return SeqNum(uint64(seqNum) + 1)
 }
 
-func GetSeqNumFrom(packetID int) SeqNum {
-	return SeqNum(packetID % 32)
+func GetSeqNumFrom(packetID int, ringSize int) SeqNum {
+	return SeqNum(packetID % ringSize)
 }
 
 // GetRingDistance Return the positive ring distance between this and other
-// Examples: 31 to 4 = 5; 4 to 31
-func (this SeqNum) GetRingDistance(other SeqNum) int {
-	difference := int(other - this)
+// Examples: 31 to 4 = 5; 4 to 31 = 27 with a ring size of 32
+func (this SeqNum) GetRingDistance(other SeqNum, ringSize int) int {
+	difference := int(other) - int(this)
 	if difference < 0 {
-		return RingSize + difference
+		return ringSize + difference
 	}
 	return difference
 }
@@ -0,0 +1,131 @@
+"""
+An asyncio version of the RDTSender.
+Every AsyncSender is a DatagramProtocol on its own UDP port, so one event loop can run many
+independent transfers. The window, timeout and EOT handling are inherited from Sender,
+only the socket and the timers are replaced by the event loop's transport and call_later.
+"""
+import argparse
+import asyncio
+import os
+
+from constants import RING_SIZE, MAX_WINDOW_SIZE
+from send import Sender
+
+
+class AsyncSender(Sender, asyncio.DatagramProtocol):
+    def __init__(self, *args, verbose=False, **kwargs):
+        # takes the same arguments as Sender
+        self.transport = None
+        self.timer_handles = {}
+        self.transfer_completed = None
+        super().__init__(*args, verbose=verbose, **kwargs)
+
+    def set_up_socket(self):
+        pass  # the datagram endpoint is created in run()
+
+    async def run(self):
+        """
+        Sends the whole file and returns after the EOT exchange with the receiver.
+        Raises a RuntimeError when the receiver does not answer the EOT, see Sender.on_EOT_time_out.
+        """
+        loop = asyncio.get_running_loop()
+        self.transfer_completed = loop.create_future()
+        _, port = self.local_addr
+        self.transport, _ = await loop.create_datagram_endpoint(lambda: self, local_addr=("0.0.0.0", port))
+        try:
+            self.send_new_packets_in_window()
+            await self.transfer_completed
+            if self.metrics is not None:
+                self.metrics.report(self.now(), force=True)
+        finally:
+            for timer_handle in self.timer_handles.values():
+                timer_handle.cancel()
+            self.timer_handles.clear()
+            self.transport.close()
+            self.close()
+
+    def datagram_received(self, data, addr):
+        self.process_received_packets(data)
+        if not self.EOT_received_event.is_set():
+            self.delayed_retransmit_all_timed_out_packets_in_window()
+            self.send_new_packets_in_window()
+        if self.metrics is not None:
+            self.metrics.report(self.now())
+
+    def error_received(self, exc):
+        pass  # e.g. ICMP port unreachable before the receiver is up; the timers retransmit
+
+    def on_timer_expired(self, packet_seq_num):
+        del self.timer_handles[packet_seq_num]
+        self.on_time_out(packet_seq_num)
+        self.delayed_retransmit_all_timed_out_packets_in_window()
+        self.send_new_packets_in_window()
+
+    def transmit(self, buffer):
+        self.transport.sendto(buffer, self.remote_addr)
+
+    def start_timer(self, packet_seq_num):
+        self.stop_timer(packet_seq_num)
+        loop = asyncio.get_running_loop()
+        self.timer_handles[packet_seq_num] = loop.call_later(self.get_retransmission_timeout(),
+                                                              self.on_timer_expired, packet_seq_num)
+
+    def stop_timer(self, packet_seq_num):
+        timer_handle = self.timer_handles.pop(packet_seq_num, None)
+        if timer_handle is not None:
+            timer_handle.cancel()
+
+    def on_transfer_completed(self):
+        self.EOT_received_event.set()
+        if not self.transfer_completed.done():
+            self.transfer_completed.set_result(None)
+
+    def on_transfer_failed(self, error):
+        # raised by run(), not in the timer callback
+        if not self.transfer_completed.done():
+            self.transfer_completed.set_exception(error)
+
+
+async def send_file(forward_recv_address, forward_recv_port, sender_recv_port, max_timeout, filename_to_send,
+                    **sender_options):
+    """
+    Starts a transfer on the running event loop and waits for its completion.
+    sender_options are the keyword arguments of Sender, e.g. log_dir or max_window_size.
+    Run several of them with asyncio.gather to send many files at once.
+    """
+    sender = AsyncSender(forward_recv_address, forward_recv_port, sender_recv_port, max_timeout, filename_to_send,
+                         **sender_options)
+    await sender.run()
+    return sender
+
+
+async def send_files(forward_recv_address, transfers, max_timeout, ring_size=RING_SIZE,
+                     max_window_size=MAX_WINDOW_SIZE):
+    # each transfer logs to its own directory, named after its receiving port
+    senders = []
+    for forward_recv_port, sender_recv_port, filename in transfers:
+        log_dir = f"logs_{sender_recv_port}"
+        os.makedirs(log_dir, exist_ok=True)
+        senders.append(send_file(forward_recv_address, forward_recv_port, sender_recv_port, max_timeout, filename,
+                                 log_dir=log_dir, ring_size=ring_size, max_window_size=max_window_size))
+    await asyncio.gather(*senders)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="send several files concurrently from one event loop")
+    parser.add_argument(dest="forward_recv_address", type=str, help="host address of the network emulator")
+    parser.add_argument(dest="max_timeout", type=int, help="timeout interval in units of millisecond")
+    parser.add_argument(dest="transfers", nargs="+", type=str,
+                        help="one <forward_recv_port>:<sender_recv_port>:<filename> per transfer")
+    parser.add_argument("--ring_size", type=int, default=RING_SIZE,
+                        help="number of sequence numbers, must match the receivers")
+    parser.add_argument("--window_size", type=int, default=MAX_WINDOW_SIZE,
+                        help="maximum window size, at most half of the ring size, must match the receivers")
+    args = parser.parse_args()
+
+    transfers = []
+    for transfer in args.transfers:
+        forward_recv_port, sender_recv_port, filename = transfer.split(":", 2)
+        transfers.append((int(forward_recv_port), int(sender_recv_port), filename))
+
+    asyncio.run(send_files(args.forward_recv_address, transfers, args.max_timeout, args.ring_size, args.window_size))
@@ -0,0 +1,285 @@
+"""
+Benchmarks the sender and the emulator over a sweep of file sizes, window sizes, timeouts, delays and drop
+probabilities, and writes the results as JSON.
+Two transports:
+    loopback   the in-process LoopbackTransfer, times are virtual, runs are exactly reproducible per seed
+    localhost  a real Sender and nEmulator process on UDP sockets, times are wall-clock;
+               the receiver is the Python stand-in of loopback.py, so that delivery times can be measured
+For every run, it reports the completion time, goodput, retransmission ratio, p50/p99 delivery latency
+(from the first transmission of a packet to its in-order delivery) and CPU time.
+The goodput counts the bytes of the file, the wire throughput the bytes of the data packets sent,
+so that a compressed transfer is compared with an uncompressed one by its goodput.
+With --baseline, runs slower than the same configuration in an earlier output by more than --tolerance
+are reported as regressions and the exit status is 1.
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import resource
+import socket
+import string
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from constants import DATA, COMPRESSED, RING_SIZE, PAY_LOAD_BYTE_LEN
+from loopback import LoopbackTransfer, LoopbackSender, LoopbackReceiver
+from packet import HEADER
+from send import Sender
+
+EMULATOR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "nEmulator",
+                             "network_emulator.py")
+EMULATOR_START_TIME = 0.5  # seconds given to the emulator to bind its sockets
+TRANSPORTS = ["loopback", "localhost"]
+COMPRESSIONS = ["none", "zlib"]
+FILE_CONTENTS = ["random", "text"]
+
+
+class BenchmarkedSender:
+    """
+    Mixed into a Sender, records the first transmission time of every packet and counts the data transmissions
+    and their bytes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.first_sent_times = []  # in file order
+        self.data_transmissions = 0
+        self.data_bytes_sent = 0
+        super().__init__(*args, **kwargs)
+
+    def transmit(self, buffer):
+        if HEADER.unpack_from(buffer)[0] & ~COMPRESSED == DATA:
+            self.data_transmissions += 1
+            self.data_bytes_sent += len(buffer)
+        super().transmit(buffer)
+
+    def on_sent_new_packet(self, packet_seq_num):
+        self.first_sent_times.append(self.now())
+        super().on_sent_new_packet(packet_seq_num)
+
+
+class BenchmarkedLoopbackSender(BenchmarkedSender, LoopbackSender):
+    pass
+
+
+class BenchmarkedUdpSender(BenchmarkedSender, Sender):
+    pass
+
+
+class UdpReceiver:
+    """
+    Runs a LoopbackReceiver on a UDP socket in a thread, until the EOT.
+    """
+
+    def __init__(self, port, remote_addr, ring_size, window_size):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", port))
+        self.receiver = LoopbackReceiver(lambda datagram: self.socket.sendto(datagram, remote_addr), ring_size,
+                                         window_size)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.receiver.EOT_received:
+            self.receiver.datagram_received(self.socket.recv(PAY_LOAD_BYTE_LEN + HEADER.size))
+        self.socket.close()
+
+
+def get_free_ports(count):
+    sockets = []
+    for _ in range(count):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        sockets.append(sock)
+    ports = [sock.getsockname()[1] for sock in sockets]
+    for sock in sockets:
+        sock.close()
+    return ports
+
+
+def get_percentile(values, percentile):
+    # nearest rank
+    if len(values) == 0:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percentile / 100 * len(ordered)) - 1)]
+
+
+def get_results(sender, receiver, file_size, completion_time, cpu_time):
+    packets = len(sender.first_sent_times)
+    latencies = [(delivered - sent) * 1000.0 for sent, delivered in zip(sender.first_sent_times,
+                                                                        receiver.delivery_times)]
+    return {
+        "completion_time": completion_time,
+        "goodput": file_size / completion_time if completion_time > 0 else None,  # bytes of the file per second
+        "wire_throughput": sender.data_bytes_sent / completion_time if completion_time > 0 else None,
+        "retransmission_ratio": (sender.data_transmissions - packets) / packets,
+        "latency_p50": get_percentile(latencies, 50),  # ms
+        "latency_p99": get_percentile(latencies, 99),
+        "cpu_time": cpu_time,
+        "final_timestamp": sender.timestamp - 1,
+    }
+
+
+def run_loopback(configuration, filename, log_dir):
+    transfer = LoopbackTransfer(filename, configuration["timeout"], configuration["delay"], configuration["drop"],
+                                seed=configuration["seed"], sender_class=BenchmarkedLoopbackSender,
+                                log_dir=log_dir, ring_size=configuration["ring_size"],
+                                max_window_size=configuration["window_size"],
+                                congestion_control=configuration["congestion_control"],
+                                compress=configuration["compression"] == "zlib")
+    start = time.process_time()
+    completion_time = transfer.run()
+    cpu_time = time.process_time() - start
+    return transfer.sender, transfer.receiver, completion_time, {"cpu_time": cpu_time}
+
+
+def run_localhost(configuration, filename, log_dir):
+    forward_port, backward_port, receiver_port, sender_port = get_free_ports(4)
+    udp_receiver = UdpReceiver(receiver_port, ("127.0.0.1", backward_port), configuration["ring_size"],
+                               configuration["window_size"])
+    udp_receiver.thread.start()
+    children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    emulator = subprocess.Popen([sys.executable, EMULATOR_PATH, str(forward_port), "127.0.0.1", str(receiver_port),
+                                 str(backward_port), "127.0.0.1", str(sender_port), str(configuration["delay"]),
+                                 str(configuration["drop"]), "--seed", str(configuration["seed"])],
+                                stdout=subprocess.DEVNULL)
+    try:
+        time.sleep(EMULATOR_START_TIME)
+        sender = BenchmarkedUdpSender("127.0.0.1", forward_port, sender_port, configuration["timeout"], filename,
+                                      verbose=False, log_dir=log_dir, ring_size=configuration["ring_size"],
+                                      max_window_size=configuration["window_size"],
+                                      congestion_control=configuration["congestion_control"],
+                                      compress=configuration["compression"] == "zlib")
+        start = time.monotonic()
+        start_cpu = time.process_time()
+        sender.start()
+        completion_time = time.monotonic() - start
+        cpu_time = time.process_time() - start_cpu
+    finally:
+        emulator.kill()
+        emulator.wait()
+    udp_receiver.thread.join()
+    # the emulator is the only child process that ended since
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    emulator_cpu_time = usage.ru_utime + usage.ru_stime - children_usage.ru_utime - children_usage.ru_stime
+    return sender, udp_receiver.receiver, completion_time, {"cpu_time": cpu_time,
+                                                             "emulator_cpu_time": emulator_cpu_time}
+
+
+def run_benchmark(configuration, filename):
+    with tempfile.TemporaryDirectory() as log_dir:
+        run = run_loopback if configuration["transport"] == "loopback" else run_localhost
+        sender, receiver, completion_time, cpu_times = run(configuration, filename, log_dir)
+    with open(filename, "rb") as file:
+        if file.read() != receiver.file_received:
+            raise RuntimeError(f"The file received is not the file sent with {configuration}")
+    results = get_results(sender, receiver, os.path.getsize(filename), completion_time, cpu_times["cpu_time"])
+    results.update(cpu_times)
+    return results
+
+
+def get_configurations(args):
+    for transport, file_packets, file_content, window_size, timeout, delay, drop, congestion_control, compression, \
+            seed in itertools.product(args.transport, args.file_packets, args.file_content, args.window_size,
+                                      args.timeout, args.delay, args.drop, args.congestion_control,
+                                      args.compression, range(args.seed, args.seed + args.repetitions)):
+        yield {
+            "transport": transport,
+            "file_packets": file_packets,
+            "ring_size": max(RING_SIZE, 2 * window_size),
+            "window_size": window_size,
+            "timeout": timeout,
+            "delay": delay,
+            "drop": drop,
+            "congestion_control": congestion_control,
+            "compression": compression,
+            "file_content": file_content,
+            "seed": seed,
+        }
+
+
+def create_text(rng, size):
+    # words of a small vocabulary, about as compressible as English text
+    vocabulary = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(1, 9))) for _ in range(1000)]
+    text = bytearray()
+    while len(text) < size:
+        text += " ".join(rng.choices(vocabulary, k=1000)).encode() + b"\n"
+    return bytes(text[:size])
+
+
+def create_file(directory, file_packets, file_content="random"):
+    filename = os.path.join(directory, f"file_{file_packets}_{file_content}.bin")
+    if not os.path.exists(filename):
+        rng = random.Random(file_packets)
+        size = file_packets * PAY_LOAD_BYTE_LEN
+        with open(filename, "wb") as file:
+            file.write(rng.randbytes(size) if file_content == "random" else create_text(rng, size))
+    return filename
+
+
+def get_key(configuration):
+    return json.dumps(configuration, sort_keys=True)
+
+
+def find_regressions(runs, baseline_runs, tolerance):
+    baseline = {get_key(run["configuration"]): run["results"] for run in baseline_runs}
+    regressions = []
+    for run in runs:
+        baseline_results = baseline.get(get_key(run["configuration"]))
+        if baseline_results is not None and \
+                run["results"]["completion_time"] > baseline_results["completion_time"] * (1 + tolerance):
+            regressions.append({"configuration": run["configuration"],
+                                "completion_time": run["results"]["completion_time"],
+                                "baseline_completion_time": baseline_results["completion_time"]})
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="benchmark the sender and the emulator over a sweep of settings")
+    parser.add_argument("--transport", nargs="+", choices=TRANSPORTS, default=["loopback"])
+    parser.add_argument("--file_packets", nargs="+", type=int, default=[45], help="file sizes, in packets")
+    parser.add_argument("--file_content", nargs="+", choices=FILE_CONTENTS, default=["random"],
+                        help="random bytes, or text that compresses")
+    parser.add_argument("--window_size", nargs="+", type=int, default=[10])
+    parser.add_argument("--timeout", nargs="+", type=int, default=[400], help="sender max timeouts, in ms")
+    parser.add_argument("--delay", nargs="+", type=int, default=[100], help="emulator maximum delays, in ms")
+    parser.add_argument("--drop", nargs="+", type=float, default=[0.1], help="emulator drop probabilities")
+    parser.add_argument("--congestion_control", nargs="+", type=str, default=["step"])
+    parser.add_argument("--compression", nargs="+", choices=COMPRESSIONS, default=["none"])
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first repetition")
+    parser.add_argument("--repetitions", type=int, default=3, help="runs of every configuration, one seed each")
+    parser.add_argument("--output", type=str, default=None, help="JSON output file, standard output by default")
+    parser.add_argument("--baseline", type=str, default=None, help="an earlier JSON output to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="relative increase of the completion time reported as a regression")
+    args = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as file_dir:
+        for configuration in get_configurations(args):
+            filename = create_file(file_dir, configuration["file_packets"], configuration["file_content"])
+            results = run_benchmark(configuration, filename)
+            runs.append({"configuration": configuration, "results": results})
+            print(f"{configuration} -> completion {results['completion_time']:.3f}s, "
+                  f"goodput {results['goodput']:.0f}B/s, "
+                  f"retransmissions {results['retransmission_ratio']:.2f}, "
+                  f"p99 latency {results['latency_p99']:.1f}ms", file=sys.stderr)
+
+    output = {"runs": runs}
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            output["regressions"] = find_regressions(runs, json.load(file)["runs"], args.tolerance)
+    if args.output is None:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as file:
+            json.dump(output, file, indent=2)
+    if len(output.get("regressions", [])) != 0:
+        print(f"{len(output['regressions'])} regressions", file=sys.stderr)
+        sys.exit(1)
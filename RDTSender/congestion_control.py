@@ -0,0 +1,161 @@
+"""
+Congestion control for the RDTSender.
+A CongestionControl decides the window size from the signals the sender gets:
+a new ACK (with an RTT sample when Karn's rule allows one) and a lost packet (found by a timeout or otherwise).
+A packet found lost without a timeout may turn out to have been only reordered, then the window is restored.
+Packets are identified by their packet number, their position in the file, which unlike the seq num never wraps.
+"""
+from constants import INITIAL_WINDOW_SIZE
+
+INITIAL_SLOW_START_THRESHOLD = 64
+MIN_SLOW_START_THRESHOLD = 2
+
+
+class CongestionControl:
+    def __init__(self, max_window_size):
+        self.max_window_size = max_window_size
+        self.cwnd = INITIAL_WINDOW_SIZE
+        self.highest_packet_number_sent = -1
+        # losses of packets sent before this one belong to a congestion event that was already handled
+        self.recovery_end = 0
+        # the state before the latest congestion event, while every loss of that event may still be spurious
+        self.undo_state = None
+        self.unconfirmed_losses = set()  # packet numbers
+
+    def get_window_size(self):
+        return max(1, min(int(self.cwnd), self.max_window_size))
+
+    def on_packet_sent(self, packet_number):
+        self.highest_packet_number_sent = max(self.highest_packet_number_sent, packet_number)
+
+    def on_packet_acked(self, rtt):
+        pass
+
+    def on_packet_lost(self, packet_number, timed_out):
+        # react once per window of data, not once per lost packet
+        if packet_number >= self.recovery_end:
+            self.recovery_end = self.highest_packet_number_sent + 1
+            self.undo_state = self.get_state()
+            self.unconfirmed_losses = set()
+            self.on_congestion(timed_out)
+        if timed_out:
+            self.undo_state = None  # a timeout is never undone
+        self.unconfirmed_losses.add(packet_number)
+
+    def on_spurious_loss(self, packet_number):
+        # the packet was reordered, not lost; once all the losses of the event are, it never happened
+        if self.undo_state is None or packet_number not in self.unconfirmed_losses:
+            return
+        self.unconfirmed_losses.remove(packet_number)
+        if len(self.unconfirmed_losses) == 0:
+            self.set_state(self.undo_state)
+            self.undo_state = None
+
+    def on_congestion(self, timed_out):
+        pass
+
+    def get_state(self):
+        return self.cwnd
+
+    def set_state(self, state):
+        self.cwnd = state
+
+
+class StepControl(CongestionControl):
+    """
+    The original scheme: the window grows by one per new ACK and drops to one on every timeout.
+    """
+
+    def on_packet_acked(self, rtt):
+        self.cwnd = min(self.cwnd + 1, self.max_window_size)
+
+    def on_packet_lost(self, packet_number, timed_out):
+        if timed_out:
+            self.cwnd = 1
+
+
+class RenoControl(CongestionControl):
+    """
+    Slow start up to the threshold, then additive increase of one packet per window.
+    A loss halves the window; a timeout restarts slow start from one packet.
+    """
+
+    def __init__(self, max_window_size):
+        super().__init__(max_window_size)
+        self.slow_start_threshold = INITIAL_SLOW_START_THRESHOLD
+
+    def on_packet_acked(self, rtt):
+        if self.cwnd < self.slow_start_threshold:
+            self.cwnd += 1
+        else:
+            self.cwnd += 1 / self.cwnd
+        # do not grow far beyond what the sender can use
+        self.cwnd = min(self.cwnd, self.max_window_size)
+
+    def get_state(self):
+        return self.cwnd, self.slow_start_threshold
+
+    def set_state(self, state):
+        self.cwnd, self.slow_start_threshold = state
+
+    def on_congestion(self, timed_out):
+        self.slow_start_threshold = max(self.get_window_size() / 2, MIN_SLOW_START_THRESHOLD)
+        if timed_out:
+            self.cwnd = 1
+        else:
+            self.cwnd = self.slow_start_threshold
+
+
+class VegasControl(RenoControl):
+    """
+    Delay-based: compares the expected rate (window / smallest RTT) with the actual one (window / RTT of the round).
+    The difference estimates how many packets sit in the queues of the path;
+    the window grows while it is below ALPHA and shrinks when it is above BETA.
+    As in TCP Vegas, the window changes once per round of a window of ACKs, and the RTT of the round is the
+    smallest of its samples: a link that delays packets at random still delivers some of them quickly,
+    while a queue delays all of them.
+    Losses are handled as in Reno.
+    """
+    ALPHA = 2
+    BETA = 4
+
+    def __init__(self, max_window_size):
+        super().__init__(max_window_size)
+        self.base_rtt = None
+        self.round_min_rtt = None
+        self.round_acks = 0
+
+    def on_packet_acked(self, rtt):
+        if rtt is None or rtt <= 0:
+            return
+        if self.base_rtt is None or rtt < self.base_rtt:
+            self.base_rtt = rtt
+        if self.round_min_rtt is None or rtt < self.round_min_rtt:
+            self.round_min_rtt = rtt
+        self.round_acks += 1
+        if self.round_acks < self.get_window_size():
+            return
+        queued_packets = self.cwnd * (1 - self.base_rtt / self.round_min_rtt)
+        self.round_min_rtt = None
+        self.round_acks = 0
+        if self.cwnd < self.slow_start_threshold and queued_packets < self.ALPHA:
+            self.cwnd *= 2
+        elif queued_packets < self.ALPHA:
+            self.cwnd += 1
+        elif queued_packets > self.BETA:
+            self.cwnd = max(1, self.cwnd - 1)
+            self.slow_start_threshold = min(self.slow_start_threshold, self.cwnd)
+        self.cwnd = min(self.cwnd, self.max_window_size)
+
+
+CONGESTION_CONTROLS = {
+    "step": StepControl,
+    "reno": RenoControl,
+    "vegas": VegasControl,
+}
+
+
+def create_congestion_control(name, max_window_size):
+    if name not in CONGESTION_CONTROLS:
+        raise RuntimeError(f"Unknown congestion control: {name}, should be one of {list(CONGESTION_CONTROLS)}")
+    return CONGESTION_CONTROLS[name](max_window_size)
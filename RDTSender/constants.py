@@ -5,9 +5,16 @@ HEADER_BYTE_LEN = 12
 SACK = 0
 DATA = 1
 EOT = 2
+RESUME = 3
+COMPRESSED = 0x10  # flag of the type of the DATA packets carrying a zlib stream
 RING_SIZE = 32
 PAY_LOAD_BYTE_LEN = 500
-SENDING_WAITING_TIME = 0.010
-EVENT_TIMEOUT = 0
-EVENT_PACKET_RECEIVED = 1
-EVENT_QUEUE_SIZE = 512
+MIN_RETRANSMISSION_TIMEOUT = 0.020
+MAX_RETRANSMISSION_TIMEOUT = 60.0
+FAST_RETRANSMIT_THRESHOLD = 3
+MAX_EOT_RETRANSMISSIONS = 5  # before the sender gives up on the receiver's EOT
+LOG_FLUSH_INTERVAL = 0.2
+LOG_FLUSH_BATCH_SIZE = 1024
+LOG_MAX_BUFFERED_RECORDS = 8192
+TRACE_BUFFER_BYTE_LEN = 65536
+IO_BATCH_SIZE = 64  # datagrams per sendmmsg or recvmmsg call
@@ -0,0 +1,103 @@
+"""
+A compact binary trace of the sender (and nEmulator) events, as an alternative to the text logs.
+The file starts with a header and is followed by fixed-size records, so it can be appended to
+and read with mmap:
+    header: magic b"RDTTRACE", version (uint32), record size (uint32)
+    record: timestamp (int64), event (uint8), packet type (uint8), padding, seqnum (int32), value (uint32)
+For the sender, the timestamp is the logical timestamp of the text logs and the value is the window size.
+For nEmulator, the timestamp is in nanoseconds and the value is the delay in milliseconds.
+trace_converter.py turns a trace back into seqnum.log, ack.log and N.log.
+The layout must match nEmulator/event_trace.py.
+"""
+import struct
+import threading
+
+from constants import SACK, DATA, EOT, TRACE_BUFFER_BYTE_LEN
+from logger import flusher
+
+TRACE_MAGIC = b"RDTTRACE"
+TRACE_VERSION = 1
+TRACE_HEADER = struct.Struct('<8sII')
+TRACE_RECORD = struct.Struct('<qBB2xiI')
+
+# sender events, one per text log
+EVENT_SENT = 0  # seqnum.log
+EVENT_ACK = 1  # ack.log
+EVENT_WINDOW = 2  # N.log
+# nEmulator events
+EVENT_DROP = 10
+EVENT_DELAY = 11
+EVENT_FORWARD = 12
+
+
+class TraceWriter:
+    def __init__(self, filename):
+        self.file = open(filename, "wb")
+        self.file.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, TRACE_RECORD.size))
+        self.buffer = bytearray(TRACE_BUFFER_BYTE_LEN - TRACE_BUFFER_BYTE_LEN % TRACE_RECORD.size)
+        self.offset = 0
+        self.lock = threading.Lock()
+        flusher.register(self)
+
+    def write(self, timestamp, event, packet_type, seqnum, value):
+        with self.lock:
+            if self.offset == len(self.buffer):
+                self.write_buffer()
+            TRACE_RECORD.pack_into(self.buffer, self.offset, timestamp, event, packet_type, seqnum, value)
+            self.offset += TRACE_RECORD.size
+
+    def write_buffer(self):
+        # only whole records are written, so a reader never sees half of one
+        if self.offset != 0 and not self.file.closed:
+            self.file.write(memoryview(self.buffer)[:self.offset])
+            self.file.flush()
+        self.offset = 0
+
+    def flush(self):
+        # also called by the log flusher thread
+        with self.lock:
+            self.write_buffer()
+
+    def close(self):
+        flusher.unregister(self)
+        with self.lock:
+            self.write_buffer()
+            self.file.close()
+
+
+class TraceLogger:
+    """
+    Takes the place of a LoggerTimeStamped of the sender and writes its records to a shared TraceWriter.
+    :param get_window_size returns the current window size, stored in every record
+    """
+    PACKET_TYPES = {EVENT_SENT: DATA, EVENT_ACK: SACK, EVENT_WINDOW: DATA}
+
+    def __init__(self, trace_writer, event, get_window_size):
+        self.trace_writer = trace_writer
+        self.event = event
+        self.get_window_size = get_window_size
+
+    def log(self, time_stamp, message):
+        if message == "EOT":
+            self.trace_writer.write(time_stamp, self.event, EOT, 0, self.get_window_size())
+        elif self.event == EVENT_WINDOW:
+            self.trace_writer.write(time_stamp, self.event, DATA, -1, message)
+        else:
+            self.trace_writer.write(time_stamp, self.event, self.PACKET_TYPES[self.event], message,
+                                    self.get_window_size())
+
+    def close(self):
+        self.trace_writer.close()
+
+
+def read_trace(filename):
+    """
+    Yields the records of a trace as (timestamp, event, packet type, seqnum, value) tuples.
+    """
+    with open(filename, "rb") as file:
+        magic, version, record_size = TRACE_HEADER.unpack(file.read(TRACE_HEADER.size))
+        if magic != TRACE_MAGIC or version != TRACE_VERSION or record_size != TRACE_RECORD.size:
+            raise RuntimeError(f"{filename} is not a version {TRACE_VERSION} RDT trace")
+        content = file.read()
+    # a trace cut while being written may end with part of a record
+    yield from TRACE_RECORD.iter_unpack(memoryview(content)[:len(content) - len(content) % TRACE_RECORD.size])
@@ -1,9 +1,54 @@
 """
 A simple logger for writing  arrival.log.
 It will create a log file at its creation.
-TODO: add multithreading
+Records are buffered in memory and written in batches by one background thread shared by all the loggers,
+every LOG_FLUSH_INTERVAL seconds or as soon as LOG_FLUSH_BATCH_SIZE records are waiting.
+If the buffer reaches LOG_MAX_BUFFERED_RECORDS, the caller writes it itself instead of letting it grow.
+close() writes everything that is left.
 """
+import atexit
 import os
+import threading
+
+from constants import LOG_FLUSH_INTERVAL, LOG_FLUSH_BATCH_SIZE, LOG_MAX_BUFFERED_RECORDS
+
+
+class LogFlusher:
+    def __init__(self):
+        self.loggers = set()
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def register(self, logger):
+        with self.condition:
+            self.loggers.add(logger)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+    def unregister(self, logger):
+        with self.condition:
+            self.loggers.discard(logger)
+
+    def wake_up(self):
+        with self.condition:
+            self.condition.notify()
+
+    def flush_all(self):
+        with self.condition:
+            loggers = list(self.loggers)
+        for logger in loggers:
+            logger.flush()
+
+    def run(self):
+        while True:
+            with self.condition:
+                self.condition.wait(LOG_FLUSH_INTERVAL)
+            self.flush_all()
+
+
+flusher = LogFlusher()
+atexit.register(flusher.flush_all)
 
 
 class Logger:
@@ -18,14 +63,33 @@ class Logger:
         if os.path.exists(log_filename):
             os.remove(log_filename)
         self.file = open(log_filename, "w")
+        self.records = []
+        self.records_lock = threading.Lock()
+        self.write_lock = threading.Lock()  # keeps the batches in order
+        flusher.register(self)
 
     def log(self, message):
-        whole_message = f'{message}\n'
-        self.file.write(message)
-        self.file.flush()
+        with self.records_lock:
+            self.records.append(message)
+            number_of_records = len(self.records)
+        if number_of_records >= LOG_MAX_BUFFERED_RECORDS:
+            self.flush()
+        elif number_of_records == LOG_FLUSH_BATCH_SIZE:
+            flusher.wake_up()
+
+    def flush(self):
+        with self.write_lock:
+            with self.records_lock:
+                records, self.records = self.records, []
+            if len(records) != 0 and not self.file.closed:
+                self.file.write("".join(records))
+                self.file.flush()
 
     def close(self):
-        self.file.close()
+        flusher.unregister(self)
+        self.flush()
+        with self.write_lock:
+            self.file.close()
 
 
 """
@@ -0,0 +1,263 @@
+"""
+A whole transfer in one process, without sockets: a Sender, the two directions of the network emulator
+and a receiver that behaves like RDTReceiver exchange datagrams in memory, driven by a virtual clock.
+Nothing sleeps, so the delays and timeouts cost no real time and a transfer of any size under any
+loss and delay profile runs as fast as the sender's own code.
+The links are the LinkModel of nEmulator, with the emulator's EOT handling.
+"""
+import argparse
+import heapq
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+
+from async_send import AsyncSender
+from constants import SACK, DATA, EOT, RESUME, COMPRESSED, RING_SIZE, MAX_WINDOW_SIZE
+from packet import Packet, HEADER, RESUME_OFFER, get_next_seq_num
+
+# appended, so that packet.py and event_trace.py are still the ones of this directory
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "nEmulator"))
+from link_model import LinkModel, DELAY_DISTRIBUTIONS  # noqa: E402
+
+MAX_VIRTUAL_TIME = 24 * 3600.0  # a transfer still running after a virtual day is stuck
+
+
+class TimerHandle:
+    def __init__(self, callback, args):
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class VirtualClock:
+    """
+    Runs callbacks in the order of their due time. The time jumps to the due time of each callback it runs.
+    Cancelled callbacks stay in the heap until they reach the top, as in the TimerScheduler.
+    """
+
+    def __init__(self):
+        self.time = 0.0
+        self.callbacks = []  # heap of (due time, order, handle)
+        self.order = itertools.count()
+
+    def call_later(self, delay, callback, *args):
+        handle = TimerHandle(callback, args)
+        heapq.heappush(self.callbacks, (self.time + delay, next(self.order), handle))
+        return handle
+
+    def run(self, is_done, max_time=MAX_VIRTUAL_TIME):
+        while not is_done():
+            if len(self.callbacks) == 0:
+                raise RuntimeError(f"Nothing left to run at t={self.time:.3f}s before the transfer completed")
+            due_time, _, handle = heapq.heappop(self.callbacks)
+            if handle.cancelled:
+                continue
+            if due_time > max_time:
+                raise RuntimeError(f"The transfer did not complete within {max_time}s of virtual time")
+            self.time = due_time
+            handle.callback(*handle.args)
+
+
+class LoopbackLink:
+    """
+    One direction of the emulator: LinkModel decides the loss and delays,
+    an EOT is not delayed but waits until no packet of its direction is in flight.
+    """
+
+    def __init__(self, clock, link_model, deliver):
+        self.clock = clock
+        self.link_model = link_model
+        self.deliver = deliver
+        self.in_flight = 0
+        self.waiting_EOTs = []
+        self.packets_forwarded = 0
+        self.packets_dropped = 0
+
+    def send(self, datagram):
+        typ, _, _ = HEADER.unpack_from(datagram)
+        if typ == EOT:
+            if self.in_flight == 0:
+                self.clock.call_later(0, self.deliver, datagram)
+            else:
+                self.waiting_EOTs.append(datagram)
+            return
+        delays = self.link_model.get_delays(self.clock.time, len(datagram))
+        if len(delays) == 0:
+            self.packets_dropped += 1
+        for delay in delays:
+            self.in_flight += 1
+            self.clock.call_later(delay / 1000.0, self.forward, datagram)
+
+    def forward(self, datagram):
+        self.in_flight -= 1
+        self.packets_forwarded += 1
+        self.deliver(datagram)
+        if self.in_flight == 0 and len(self.waiting_EOTs) != 0:
+            waiting_EOTs, self.waiting_EOTs = self.waiting_EOTs, []
+            for EOT_datagram in waiting_EOTs:
+                self.deliver(EOT_datagram)
+
+
+class LoopbackReceiver:
+    """
+    Does what RDTReceiver does: a SACK for every data packet in the current or the previous window,
+    in-order delivery of the buffered payloads, an EOT in reply to the EOT and the bytes delivered in reply to a RESUME.
+    The payloads of compressed data packets are decompressed as they are delivered.
+    :param now returns the current time, recorded for every payload delivered
+    :param delivered the bytes delivered by an earlier run, as RDTReceiver reads them back with -resume
+    """
+
+    def __init__(self, send, ring_size=RING_SIZE, window_size=MAX_WINDOW_SIZE, now=time.monotonic, delivered=b""):
+        self.send = send
+        self.now = now
+        self.ring_size = ring_size
+        self.window_size = window_size
+        self.receive_base = 0
+        self.payload_buffer = {}
+        self.file_received = bytearray(delivered)
+        self.resume_offer = RESUME_OFFER.pack(len(delivered), zlib.crc32(delivered))
+        self.decompressor = None  # from the first compressed data packet on
+        self.delivery_times = []  # of each payload, in file order
+        self.packets_received = 0
+        self.EOT_received = False
+
+    def get_ring_distance(self, start, end):
+        return (end - start) % self.ring_size
+
+    def datagram_received(self, datagram):
+        packet = Packet(datagram)
+        if packet.typ & ~COMPRESSED == DATA:
+            self.packets_received += 1
+            if packet.typ & COMPRESSED and self.decompressor is None:
+                self.decompressor = zlib.decompressobj()
+            distance = self.get_ring_distance(packet.seqnum, self.receive_base)
+            if 1 <= distance <= self.window_size:  # in the previous window
+                self.send_ack(packet.seqnum)
+            elif self.get_ring_distance(self.receive_base, packet.seqnum) < self.window_size:
+                self.send_ack(packet.seqnum)
+                self.payload_buffer.setdefault(packet.seqnum, bytes(packet.data))
+                self.slide_window()
+        elif packet.typ == RESUME:
+            self.send(Packet(RESUME, 0, RESUME_OFFER.size, self.resume_offer).encode())
+        elif packet.typ == EOT and packet.length == 0:
+            self.EOT_received = True
+            if self.decompressor is not None:
+                self.file_received += self.decompressor.flush()
+            self.send(Packet(EOT, 0, 0, b"").encode())
+
+    def send_ack(self, seq_num):
+        self.send(Packet(SACK, seq_num, 0, b"").encode())
+
+    def slide_window(self):
+        while self.receive_base in self.payload_buffer:
+            payload = self.payload_buffer.pop(self.receive_base)
+            self.file_received += payload if self.decompressor is None else self.decompressor.decompress(payload)
+            self.delivery_times.append(self.now())
+            self.receive_base = get_next_seq_num(self.receive_base, self.ring_size)
+
+
+class LoopbackSender(AsyncSender):
+    """
+    An AsyncSender whose datagrams go to a LoopbackLink and whose timers and clock are the VirtualClock's.
+    """
+
+    def __init__(self, clock, link, max_timeout, filename_to_send, **sender_options):
+        self.clock = clock
+        self.link = link
+        super().__init__("loopback", 0, 0, max_timeout, filename_to_send, **sender_options)
+
+    def now(self):
+        return self.clock.time
+
+    def transmit(self, buffer):
+        self.link.send(bytes(buffer))
+
+    def start_timer(self, packet_seq_num):
+        self.stop_timer(packet_seq_num)
+        self.timer_handles[packet_seq_num] = self.clock.call_later(self.get_retransmission_timeout(),
+                                                                   self.on_timer_expired, packet_seq_num)
+
+    def on_transfer_completed(self):
+        self.EOT_received_event.set()
+        for timer_handle in self.timer_handles.values():
+            timer_handle.cancel()
+        self.timer_handles.clear()
+
+    def on_transfer_failed(self, error):
+        raise error  # out of LoopbackTransfer.run()
+
+
+class LoopbackTransfer:
+    """
+    Sends filename_to_send through an emulated link of max_delay ms and prob_discard, all in memory.
+    :param link_options the optional keyword arguments of LinkModel, e.g. rate or burst_loss
+    :param sender_options the keyword arguments of Sender, e.g. max_window_size or congestion_control
+    :param sender_class LoopbackSender or a subclass of it
+    :param delivered the bytes the receiver delivered in an earlier run, for a sender given resume=True
+    The receiver uses the ring and window sizes of the sender.
+    """
+
+    def __init__(self, filename_to_send, max_timeout, max_delay, prob_discard, seed=0, link_options=None,
+                 sender_class=LoopbackSender, delivered=b"", **sender_options):
+        self.clock = VirtualClock()
+        link_options = link_options or {}
+        # one generator per direction, as in the emulator
+        self.forward_link = LoopbackLink(
+            self.clock, LinkModel(random.Random(2 * seed), max_delay, prob_discard, **link_options),
+            lambda datagram: self.receiver.datagram_received(datagram))
+        self.backward_link = LoopbackLink(
+            self.clock, LinkModel(random.Random(2 * seed + 1), max_delay, prob_discard, **link_options),
+            lambda datagram: self.sender.datagram_received(datagram, None))
+        self.sender = sender_class(self.clock, self.forward_link, max_timeout, filename_to_send, **sender_options)
+        self.receiver = LoopbackReceiver(self.backward_link.send, self.sender.ring_size, self.sender.max_window_size,
+                                         lambda: self.clock.time, delivered)
+
+    def run(self):
+        """
+        Runs the transfer to the end of the EOT exchange and returns its duration in virtual seconds.
+        """
+        try:
+            self.clock.call_later(0, self.sender.send_new_packets_in_window)
+            self.clock.run(self.sender.EOT_received_event.is_set)
+            if self.sender.metrics is not None:
+                self.sender.metrics.report(self.clock.time, force=True)
+        finally:
+            self.sender.close()
+        return self.clock.time
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="run a transfer through an in-memory emulator on a virtual clock")
+    parser.add_argument(dest="filename", type=str, help="the file to send")
+    parser.add_argument(dest="max_timeout", type=int, help="timeout interval in units of millisecond")
+    parser.add_argument(dest="max_delay", type=int, help="maximum delay of the link in units of millisecond")
+    parser.add_argument(dest="prob_discard", type=float, help="packet discard probability")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the loss and delay decisions")
+    parser.add_argument("--delay_distribution", choices=DELAY_DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--ring_size", type=int, default=RING_SIZE)
+    parser.add_argument("--window_size", type=int, default=MAX_WINDOW_SIZE)
+    parser.add_argument("--congestion_control", type=str, default="step")
+    parser.add_argument("--log_dir", type=str, default=None,
+                        help="directory of seqnum.log, ack.log and N.log, a temporary one by default")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        transfer = LoopbackTransfer(args.filename, args.max_timeout, args.max_delay, args.prob_discard,
+                                    seed=args.seed, link_options=dict(delay_distribution=args.delay_distribution),
+                                    log_dir=args.log_dir or temporary_dir, ring_size=args.ring_size,
+                                    max_window_size=args.window_size, congestion_control=args.congestion_control)
+        start = time.process_time()
+        virtual_time = transfer.run()
+        cpu_time = time.process_time() - start
+    with open(args.filename, "rb") as file:
+        identical = file.read() == transfer.receiver.file_received
+    print(f"final timestamp: {transfer.sender.timestamp - 1}")
+    print(f"virtual time: {virtual_time:.3f}s, cpu time: {cpu_time:.3f}s")
+    print(f"file received {'identical' if identical else 'DIFFERENT'}")
@@ -0,0 +1,155 @@
+"""
+Counters and histograms of a running Sender, cheap enough to be kept on under load.
+The sender reports its events to a SenderMetrics; snapshot() returns everything as a JSON-serializable dict.
+Every report_interval seconds, the sender's loop passes a snapshot to the callbacks,
+e.g. a MetricsFileExporter or a MetricsSocketExporter.
+"""
+import bisect
+import json
+import socket
+import threading
+from collections import deque
+
+COUNTERS = ["packets_sent", "delayed_retransmissions", "fast_retransmissions", "timeout_retransmissions",
+            "spurious_retransmissions", "timeouts", "new_acks", "duplicate_acks"]
+# upper bounds of the buckets, the last bucket has no upper bound
+TIME_BUCKETS = [0.00001 * 2 ** i for i in range(20)]  # 10 us to about 5 s
+BATCH_BUCKETS = [0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+WINDOW_HISTORY_LEN = 1024  # (time, window size) changes kept
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def get_percentile(self, percentile):
+        # the upper bound of the bucket holding the percentile, the maximum for the last bucket
+        rank = percentile / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank and seen != 0:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count != 0 else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.get_percentile(50),
+            "p99": self.get_percentile(99),
+            "buckets": {str(bound): count for bound, count in zip(self.bounds + ["inf"], self.counts) if count != 0},
+        }
+
+
+class SenderMetrics:
+    """
+    :param report_interval seconds between two calls of the callbacks
+    :param callbacks called with a snapshot, from the sender's loop
+    """
+
+    def __init__(self, report_interval=1.0, callbacks=()):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.rtt = Histogram(TIME_BUCKETS)
+        self.receive_batch_sizes = Histogram(BATCH_BUCKETS)  # datagrams read per wake-up
+        self.handler_times = {}  # handler name -> Histogram of its durations
+        self.window_sizes = deque(maxlen=WINDOW_HISTORY_LEN)
+        self.report_interval = report_interval
+        self.callbacks = list(callbacks)
+        self.next_report_time = None
+
+    def on_event(self, counter, now, window_size):
+        self.counters[counter] += 1
+        if len(self.window_sizes) == 0 or self.window_sizes[-1][1] != window_size:
+            self.window_sizes.append((now, window_size))
+
+    def on_rtt_sample(self, rtt):
+        self.rtt.add(rtt)
+
+    def on_receive_batch(self, size):
+        self.receive_batch_sizes.add(size)
+
+    def on_handler_finished(self, name, duration):
+        if name not in self.handler_times:
+            self.handler_times[name] = Histogram(TIME_BUCKETS)
+        self.handler_times[name].add(duration)
+
+    def snapshot(self):
+        return {
+            "counters": dict(self.counters),
+            "rtt": self.rtt.snapshot(),
+            "receive_batch_sizes": self.receive_batch_sizes.snapshot(),
+            "handler_times": {name: histogram.snapshot() for name, histogram in self.handler_times.items()},
+            "window_sizes": list(self.window_sizes),
+        }
+
+    def report(self, now, force=False):
+        if len(self.callbacks) == 0:
+            return
+        if self.next_report_time is None:
+            self.next_report_time = now + self.report_interval
+        if force or now >= self.next_report_time:
+            self.next_report_time = now + self.report_interval
+            snapshot = self.snapshot()
+            for callback in self.callbacks:
+                callback(snapshot)
+
+
+class MetricsFileExporter:
+    """
+    Appends every snapshot to a file as one line of JSON.
+    """
+
+    def __init__(self, filename):
+        self.file = open(filename, "a")
+
+    def __call__(self, snapshot):
+        self.file.write(json.dumps(snapshot) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class MetricsSocketExporter:
+    """
+    Serves the latest snapshot as JSON to every TCP connection on 127.0.0.1:port, e.g. `nc 127.0.0.1 <port>`.
+    The snapshot is encoded by the sender's loop, so the serving thread never touches the metrics.
+    """
+
+    def __init__(self, port):
+        self.latest = b"{}\n"
+        self.server_socket = socket.create_server(("127.0.0.1", port))
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def __call__(self, snapshot):
+        self.latest = (json.dumps(snapshot) + "\n").encode()
+
+    def serve(self):
+        while True:
+            try:
+                connection, _ = self.server_socket.accept()
+            except OSError:
+                return  # closed
+            with connection:
+                connection.sendall(self.latest)
+
+    def close(self):
+        self.server_socket.close()
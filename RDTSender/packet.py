@@ -1,7 +1,12 @@
 # Packet definition for CS 456/656 Winter 2021 Assignment 2
 import struct
 
-from constants import RING_SIZE
+from constants import RING_SIZE, HEADER_BYTE_LEN, PAY_LOAD_BYTE_LEN
+
+# type, seqnum, length in network byte order
+HEADER = struct.Struct('!iii')
+# payload of the RESUME from the receiver: the number of bytes it delivered in an earlier run and their CRC-32
+RESUME_OFFER = struct.Struct('!QI')
 
 
 class Packet:
@@ -9,37 +14,43 @@ class Packet:
         Constructs a Packet either by specifying the fields, or providing a byte encoded Packet constructed by encode
         Construction by fields:
             Packet(type, seqnum, length, data)
-                type - the type of packet, 0 = ACK, 1 = data, 2 = EOT
+                type - the type of packet, 0 = ACK, 1 = data, 2 = EOT, 3 = RESUME
                 seqnum - the seqeunce number mod 32
                 length - the length of data AT MOST 500
-                data - the data being sent
+                data - the data being sent, as bytes
         Construction by encoded Packet
             Packet(encoded_packet)
-                encoded_packet - a packet encoded as a bytes object
+                encoded_packet - a packet encoded as a bytes-like object
+                data is then a memoryview into encoded_packet, no payload bytes are copied
     """
 
     def __init__(self, *args):
         if len(args) == 1:
-            if not isinstance(args[0], bytes):
+            if not isinstance(args[0], (bytes, bytearray, memoryview)):
                 raise RuntimeError("Received one argument and expect bytes. Got={}\n".format(type(args[0])))
-            self.typ, self.seqnum, self.length, self.data = struct.unpack('!iii{}s'.format(len(args[0]) - 12), args[0])
-            _, _, _, self.data = struct.unpack('!iii{}s'.format(self.length), args[0])
-            self.data = self.data.decode('ASCII')[0:self.length]
+            self.typ, self.seqnum, self.length = HEADER.unpack_from(args[0])
+            self.data = memoryview(args[0])[HEADER_BYTE_LEN:HEADER_BYTE_LEN + self.length]
+            self.encoded = args[0]
         else:
-            if len(args[3]) > 500:
-                raise RuntimeError("messages to be sent should be at most 500 characters long")
+            if not isinstance(args[3], (bytes, bytearray, memoryview)):
+                raise RuntimeError("Packet data should be bytes. Got={}\n".format(type(args[3])))
+            if len(args[3]) > PAY_LOAD_BYTE_LEN:
+                raise RuntimeError("messages to be sent should be at most 500 bytes long")
             self.typ = int(args[0])
             self.seqnum = int(args[1])
             self.length = int(args[2])
             self.data = args[3]
+            self.encoded = None
 
     """
         Returns self encoded as a bytes object to be sent over the network
+        The encoding is cached, so retransmissions do not encode the packet again
     """
 
     def encode(self):
-        encoded_data = self.data.encode('ASCII')
-        return struct.pack('!iii{}s'.format(self.length), self.typ, self.seqnum, self.length, encoded_data)
+        if self.encoded is None:
+            self.encoded = HEADER.pack(self.typ, self.seqnum, self.length) + self.data[:self.length]
+        return self.encoded
 
     """
         Returns the type, seqnum, length, and data of a packet
@@ -56,20 +67,20 @@ class Packet:
         ret = "Type=" + str(self.typ) + "\n"
         ret += "Seqnum=" + str(self.seqnum) + "\n"
         ret += "Length=" + str(self.length) + "\n"
-        ret += "Data=" + self.data
+        ret += "Data=" + repr(bytes(self.data))
         return ret
 
 
-def get_next_seq_num(seq_num):
-    if seq_num < RING_SIZE - 1:
+def get_next_seq_num(seq_num, ring_size=RING_SIZE):
+    if 0 <= seq_num < ring_size - 1:
         return seq_num + 1
-    elif seq_num == 31:
+    elif seq_num == ring_size - 1:
         return 0
-    raise Exception(f"SeqNum: {seq_num} exceeded Ring Size: {RING_SIZE}")
+    raise Exception(f"SeqNum: {seq_num} exceeded Ring Size: {ring_size}")
 
 
 if __name__ == '__main__':
-    testmsg = "testmsg"
+    testmsg = b"testmsg"
     packet1 = Packet(0, 1, len(testmsg), testmsg)
     print(packet1)
     packet1_enc = packet1.encode()
@@ -0,0 +1,76 @@
+"""
+Reads the file to send one payload at a time, as the window advances.
+One payload is read ahead so that the sender knows when the file ends.
+With an offset and a length, only that range of the file is read, e.g. one stripe of a striped transfer.
+With compress, the payloads are the consecutive bytes of a zlib stream of the range, compressed as it is read.
+"""
+import math
+import os
+import zlib
+
+from constants import PAY_LOAD_BYTE_LEN
+
+COMPRESSION_CHUNK_LEN = 65536  # bytes of the file compressed at once
+
+
+class PayloadReader:
+    def __init__(self, filename, payload_len=PAY_LOAD_BYTE_LEN, offset=0, length=None, compress=False):
+        self.payload_len = payload_len
+        file_size = os.path.getsize(filename)
+        if not 0 <= offset <= file_size:
+            raise RuntimeError(f"Offset: {offset} is outside of {filename} of {file_size} bytes")
+        # the rest of the file by default
+        self.length = file_size - offset if length is None else min(length, file_size - offset)
+        self.remaining = self.length
+        # before compression when compressed
+        self.number_of_payloads = max(1, math.ceil(self.remaining / payload_len))
+        self.compressor = zlib.compressobj() if compress else None
+        self.compressed = bytearray()  # compressed bytes not in a payload yet
+        self.file = open(filename, 'rb')
+        self.file.seek(offset)
+        # the empty file is still sent as one empty payload
+        self.next_payload = self.read_payload()
+
+    def read_payload(self):
+        if self.compressor is None and len(self.compressed) == 0:
+            payload = self.file.read(min(self.payload_len, self.remaining))
+            self.remaining -= len(payload)
+            return payload
+        while len(self.compressed) < self.payload_len and self.compressor is not None:
+            chunk = self.file.read(min(COMPRESSION_CHUNK_LEN, self.remaining))
+            self.remaining -= len(chunk)
+            if chunk == b"":
+                self.compressed += self.compressor.flush()
+                self.compressor = None  # the stream is complete
+            else:
+                self.compressed += self.compressor.compress(chunk)
+        payload = bytes(self.compressed[:self.payload_len])
+        del self.compressed[:self.payload_len]
+        return payload
+
+    def has_next_payload(self):
+        return self.next_payload is not None
+
+    def read_next_payload(self):
+        payload = self.next_payload
+        self.next_payload = self.read_payload()
+        if self.next_payload == b"":
+            self.next_payload = None
+            self.file.close()
+        return payload
+
+    def close(self):
+        self.file.close()
+
+
+def get_crc32(filename, offset, length, chunk_len=1 << 20):
+    checksum = 0
+    with open(filename, 'rb') as file:
+        file.seek(offset)
+        while length > 0:
+            chunk = file.read(min(chunk_len, length))
+            if chunk == b"":
+                break
+            checksum = zlib.crc32(chunk, checksum)
+            length -= len(chunk)
+    return checksum
@@ -0,0 +1,43 @@
+"""
+Computes the retransmission timeout from the measured round-trip times, as in RFC 6298.
+Samples must not come from retransmitted packets (Karn's rule); the caller is responsible for that.
+All times are in seconds.
+"""
+from constants import MIN_RETRANSMISSION_TIMEOUT, MAX_RETRANSMISSION_TIMEOUT
+
+ALPHA = 1 / 8
+BETA = 1 / 4
+K = 4
+
+
+class RttEstimator:
+    """
+    :param initial_timeout the timeout used before the first sample, e.g. the one given on the command line
+    :param max_timeout the timeout never grows above it, even with backoff
+    """
+
+    def __init__(self, initial_timeout, min_timeout=MIN_RETRANSMISSION_TIMEOUT, max_timeout=MAX_RETRANSMISSION_TIMEOUT):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.srtt = None
+        self.rttvar = None
+        self.timeout = self.bound(initial_timeout)
+
+    def bound(self, timeout):
+        return min(self.max_timeout, max(self.min_timeout, timeout))
+
+    def add_sample(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - BETA) * self.rttvar + BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - ALPHA) * self.srtt + ALPHA * rtt
+        # a new sample also ends the backoff
+        self.timeout = self.bound(self.srtt + K * self.rttvar)
+
+    def back_off(self):
+        self.timeout = self.bound(self.timeout * 2)
+
+    def get_timeout(self):
+        return self.timeout
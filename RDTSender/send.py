@@ -1,117 +1,225 @@
 import argparse
-import queue
+import bisect
+import os
+import selectors
 import threading
 import socket
-from queue import Queue
+import time
 
-from constants import INITIAL_WINDOW_SIZE, SACK, EOT, PACKET_BYTE_LEN, MAX_WINDOW_SIZE, RING_SIZE, DATA, \
-    PAY_LOAD_BYTE_LEN, EVENT_TIMEOUT, EVENT_PACKET_RECEIVED, EVENT_QUEUE_SIZE, SENDING_WAITING_TIME
+from constants import SACK, EOT, RESUME, COMPRESSED, PACKET_BYTE_LEN, MAX_WINDOW_SIZE, RING_SIZE, DATA, \
+    FAST_RETRANSMIT_THRESHOLD, IO_BATCH_SIZE, MAX_EOT_RETRANSMISSIONS
+from congestion_control import create_congestion_control, CONGESTION_CONTROLS
+from event_trace import TraceWriter, TraceLogger, EVENT_SENT, EVENT_ACK, EVENT_WINDOW
 from logger import LoggerTimeStamped
-from packet import Packet, get_next_seq_num
+from metrics import SenderMetrics, MetricsFileExporter, MetricsSocketExporter
+from packet import Packet, HEADER, RESUME_OFFER, get_next_seq_num
+from payload_reader import PayloadReader, get_crc32
+from rtt_estimator import RttEstimator
+from send_window import SendWindow
+from timer import TimerScheduler
+from udp_batch import BatchSender, BatchReceiver
 
+RESUME_TIMER = -1  # the timer of the RESUME request, never a sequence number
+EOT_TIMER = -2  # the timer of the EOT, waiting for the receiver's EOT
 
-class Sender:
-    EOT_received_event = threading.Event()
-    EOT_sent_event = threading.Event()
-    # Set up loggers
-    seq_num_logger = LoggerTimeStamped("seqnum")
-    N_logger = LoggerTimeStamped("N")
-    ack_logger = LoggerTimeStamped("ack")
 
+class Sender:
     def __init__(self, forward_recv_address, forward_recv_port, sender_recv_port, max_timeout, filename_to_send,
-                 verbose=True):
+                 verbose=True, log_dir=".", ring_size=RING_SIZE, max_window_size=MAX_WINDOW_SIZE,
+                 adaptive_timeout=True, max_rto=None, congestion_control="step", fast_retransmit=True,
+                 trace_filename=None, metrics=None, file_offset=0, file_length=None, resume=False,
+                 compress=False):
+        # Selective repeat needs the window to be at most half of the sequence space,
+        # the receiver must be started with the same sizes
+        if not 1 <= max_window_size <= ring_size // 2:
+            raise RuntimeError(f"Window size: {max_window_size} should be between 1 and half of Ring Size: {ring_size}")
+        # the receiver cannot restart a zlib stream from the middle
+        if resume and compress:
+            raise RuntimeError("A compressed transfer cannot be resumed")
+        self.ring_size = ring_size
+        self.max_window_size = max_window_size
+        self.EOT_received_event = threading.Event()
+        self.EOT_sent_event = threading.Event()
+        self.EOT_retransmissions = 0
+        # Set up loggers, or a binary trace in their place
+        if trace_filename is None:
+            self.seq_num_logger = LoggerTimeStamped(os.path.join(log_dir, "seqnum"))
+            self.N_logger = LoggerTimeStamped(os.path.join(log_dir, "N"))
+            self.ack_logger = LoggerTimeStamped(os.path.join(log_dir, "ack"))
+        else:
+            trace_writer = TraceWriter(trace_filename)
+            self.seq_num_logger = TraceLogger(trace_writer, EVENT_SENT, lambda: self.window_size)
+            self.N_logger = TraceLogger(trace_writer, EVENT_WINDOW, lambda: self.window_size)
+            self.ack_logger = TraceLogger(trace_writer, EVENT_ACK, lambda: self.window_size)
         self.verbose = verbose
+        self.metrics = metrics  # a SenderMetrics, or None
         self.filename_to_send = filename_to_send
         self.remote_addr = (forward_recv_address, forward_recv_port)
         self.local_addr = ("", sender_recv_port)
         self.max_timeout = max_timeout / 1000.0  # max timeout the timer will wait after sending the packet
-        self.window_size = INITIAL_WINDOW_SIZE
+        # With an adaptive timeout, max_timeout is the timeout used until the first RTT sample,
+        # and by default also the upper bound of the measured timeout and its backoff
+        self.rtt_estimator = None
+        if adaptive_timeout:
+            self.rtt_estimator = RttEstimator(self.max_timeout, max_timeout=max_rto or self.max_timeout)
+        self.congestion_control = create_congestion_control(congestion_control, max_window_size)
+        self.window_size = self.congestion_control.get_window_size()
         self.timestamp = 0
-        self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.udp_socket.bind(self.local_addr)
-        self.receiving_thread = threading.Thread(target=self.receive_packets)
-        self.data_pointer = 0
-        self.data = []
-        self.set_data()
+        self.data_pointer = 0  # the number of payloads read so far
+        # only the range [file_offset, file_offset + file_length) is sent, the whole file by default
+        self.file_offset = file_offset
+        self.payload_reader = PayloadReader(self.filename_to_send, offset=file_offset, length=file_length,
+                                            compress=compress)
+        self.data_type = DATA | COMPRESSED if compress else DATA  # tells the receiver to decompress
+        # With resume, no data is sent before the receiver tells how many bytes it already delivered,
+        # None until then
+        self.resumed_bytes = None if resume else 0
+        self.resume_requested = False
         self.send_base = 0
         self.next_seq_num = 0
-        self.packets_sent = {}
-        self.timers = {}
-        self.packets_timed_out = []
-        self.acked_packets = []
-        self.event_queue = Queue(EVENT_QUEUE_SIZE)
-
-    def set_data(self):
-        with open(self.filename_to_send, 'r') as file:
-            payload = file.read(PAY_LOAD_BYTE_LEN)
-
-            if payload == "":
-                self.data.append(payload)  # sender the empty file
-            else:
-                while payload != "":
-                    self.data.append(payload)
-                    payload = file.read(PAY_LOAD_BYTE_LEN)
+        self.send_window = SendWindow(self.ring_size)
+        self.fast_retransmit = fast_retransmit
+        self.highest_acked_packet_numbers = []  # the FAST_RETRANSMIT_THRESHOLD highest ones, in ascending order
+        self.next_packet_number_to_check = 0  # packets before it were already checked for loss
+        # the first transmission time and RTT of the most recently sent packet acked, as in RACK (RFC 8985)
+        self.rack_sent_time = None
+        self.rack_rtt = 0.0
+        # how much later than that RTT a packet may still be acked: 0 until packets are acked out of order,
+        # then the spread of the RTTs measured, plus a quarter of the SRTT per spurious fast retransmission
+        self.reordering_window = 0.0
+        self.reordering_seen = False
+        self.highest_delivered_packet_number = -1
+        self.min_rtt = float("inf")
+        self.max_rtt = 0.0
+        self.timer_scheduler = TimerScheduler()
+        self.set_up_socket()
+
+    def set_up_socket(self):
+        self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp_socket.bind(self.local_addr)
+        self.batch_sender = BatchSender(self.udp_socket, self.remote_addr, IO_BATCH_SIZE)
+        self.batch_receiver = BatchReceiver(self.udp_socket, IO_BATCH_SIZE, PACKET_BYTE_LEN)
+        self.outgoing = []  # datagrams transmitted since the last flush_transmissions()
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.udp_socket, selectors.EVENT_READ)
 
     def __str__(self):
         return "RDT Sender Info: \n" + \
             f"Listening on local addr: {self.local_addr}\n" + \
             f"Will send packets to {self.remote_addr}\n" + \
             f"Will Send file: {self.filename_to_send} \n" + \
-            f"Number of Packets: {len(self.data)}\n" + \
-            f"Will retransmit packet after {self.max_timeout} ms\n"
+            f"Number of Packets: {self.payload_reader.number_of_payloads}" + \
+            (" before compression\n" if self.data_type != DATA else "\n") + \
+            f"Will retransmit packet after {self.max_timeout} s" + \
+            (" at first, then after the measured RTO\n" if self.rtt_estimator is not None else "\n")
 
     def start(self):
-        self.receiving_thread.start()
-
+        # One thread does everything: the loop blocks until a packet arrives or the earliest timer expires.
+        # The window can only open after one of these events, so the sender never has to spin on it.
+        # Everything transmitted in one turn goes out in one burst, and every ACK waiting on the socket is read
+        # and processed in one pass before the window is used again.
         while not self.EOT_received_event.is_set():
-            try:
-                event = self.event_queue.get_nowait()
-                if event[0] == EVENT_TIMEOUT:
-                    packet_seq_num = event[1]
-                    self.on_time_out(packet_seq_num)
-                elif event[0] == EVENT_PACKET_RECEIVED:
-                    packet_buff = event[1]
-                    self.process_received_packets(packet_buff)
-            except queue.Empty:
-                self.delayed_retransmit_all_timed_out_packets_in_window()
-                self.send_new_packet()
-
-        self.receiving_thread.join()
+            self.run_handler("delayed_retransmit", self.delayed_retransmit_all_timed_out_packets_in_window)
+            self.run_handler("send_new_packets", self.send_new_packets_in_window)
+            self.run_handler("flush_transmissions", self.flush_transmissions)
+            if self.run_handler("wait_for_packets", self.selector.select, self.get_time_until_next_timeout()):
+                packet_buffers = self.receive_packets()
+                if self.metrics is not None:
+                    self.metrics.on_receive_batch(len(packet_buffers))
+                self.run_handler("process_received_packets", self.process_all_received_packets, packet_buffers)
+            for packet_seq_num in self.timer_scheduler.pop_expired_timers(self.now()):
+                self.run_handler("time_out", self.on_time_out, packet_seq_num)
+            if self.metrics is not None:
+                self.metrics.report(self.now())
+
+        if self.metrics is not None:
+            self.metrics.report(self.now(), force=True)
+        self.selector.close()
         self.close()
 
+    def run_handler(self, name, handler, *args, **kwargs):
+        # times the handlers of the loop when there are metrics
+        if self.metrics is None:
+            return handler(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            self.metrics.on_handler_finished(name, time.perf_counter() - start)
+
+    def process_all_received_packets(self, packet_buffers):
+        for packet_buffer in packet_buffers:
+            if self.EOT_received_event.is_set():
+                return  # the socket is closed
+            self.process_received_packets(packet_buffer)
+
+    def get_time_until_next_timeout(self):
+        # None blocks until the next packet arrives
+        deadline = self.timer_scheduler.get_next_deadline()
+        if deadline is None:
+            return None
+        return max(0.0, deadline - self.now())
+
     def delayed_retransmit_all_timed_out_packets_in_window(self):
-        for packet_seq_num in self.packets_timed_out:
+        packet_seq_num = self.send_window.pop_timed_out_packet(self.is_seq_num_in_window)
+        while packet_seq_num is not None:
             self.delayed_retransmit_packet_timed_out(packet_seq_num)
+            packet_seq_num = self.send_window.pop_timed_out_packet(self.is_seq_num_in_window)
+
+    # The socket, the timers and the clock are only touched through these methods, so that another transport can
+    # reuse the window logic (see async_send.py)
+    def now(self):
+        return time.monotonic()
 
-    def put_timeout_event_in_event_queue(self, packet_seq_num):
-        event_timed_out = (EVENT_TIMEOUT, packet_seq_num)
-        self.event_queue.put(event_timed_out)
+    def get_retransmission_timeout(self):
+        if self.rtt_estimator is None:
+            return self.max_timeout
+        return self.rtt_estimator.get_timeout()
+
+    def transmit(self, buffer):
+        # sent by the next flush_transmissions()
+        self.outgoing.append(buffer)
+
+    def flush_transmissions(self):
+        if len(self.outgoing) != 0:
+            self.batch_sender.send(self.outgoing)
+            self.outgoing = []
+
+    def start_timer(self, packet_seq_num):
+        self.timer_scheduler.start_timer(packet_seq_num, self.now() + self.get_retransmission_timeout())
+
+    def stop_timer(self, packet_seq_num):
+        self.timer_scheduler.cancel_timer(packet_seq_num)
 
     def send_data_packet_start_timer(self, packet):
         buffer = packet.encode()
-        self.udp_socket.sendto(buffer, self.remote_addr)
-        timer = threading.Timer(self.max_timeout, self.put_timeout_event_in_event_queue, args=(packet.seqnum,))
-        timer.daemon = True
-        timer.start()
-        self.timers[packet.seqnum] = timer
+        self.transmit(buffer)
+        self.start_timer(packet.seqnum)
+
+    def send_new_packets_in_window(self):
+        if self.resumed_bytes is None and not self.resume_requested:
+            self.send_resume_request()
+        while self.is_next_seq_num_in_window() and self.has_packets_to_send():
+            self.send_new_packet()
 
     def send_new_packet(self):
         if self.is_next_seq_num_in_window() and self.has_packets_to_send():
             data = self.get_next_data()
-            packet = Packet(DATA, self.next_seq_num, len(data), data)
+            packet = Packet(self.data_type, self.next_seq_num, len(data), data)
             self.send_data_packet_start_timer(packet)
             self.increase_next_seq_num_by_one()
             if self.verbose:
                 print(f"Sending New Packet: \n {packet}")
                 print(f"Timestamp: {self.timestamp}")
             self.on_sent_new_packet(packet.seqnum)
-            self.packets_sent[packet.seqnum] = packet  # for retransmission
+            self.send_window.on_packet_sent(packet, self.data_pointer - 1, self.now())  # for retransmission
+            self.congestion_control.on_packet_sent(self.data_pointer - 1)
 
     def delayed_retransmit_packet_timed_out(self, packet_seq_num):
         if self.is_seq_num_in_window(packet_seq_num) and self.is_packet_not_acked(packet_seq_num):
-            packet = self.packets_sent[packet_seq_num]
+            packet = self.send_window.get_packet(packet_seq_num)
             self.send_data_packet_start_timer(packet)
-            self.packets_timed_out.remove(packet_seq_num)
+            self.send_window.on_packet_retransmitted(packet_seq_num)
             if self.verbose:
                 print(f"Delayed Retransmission Packet: \n {packet}")
                 print(f"Timestamp: {self.timestamp}")
@@ -121,16 +229,11 @@ class Sender:
         return self.is_seq_num_in_window(self.next_seq_num)
 
     def is_seq_num_in_window(self, seq_num):
-        if self.send_base <= RING_SIZE - self.window_size:
-            window_end_seq_num = self.send_base + self.window_size - 1
-            return self.send_base <= seq_num <= window_end_seq_num
-        else:
-            window_end_seq_num = self.window_size - 1 - (RING_SIZE - self.send_base)
-            # hit the ring
-            return seq_num >= self.send_base or seq_num <= window_end_seq_num
+        # distance from the send base along the ring
+        return (seq_num - self.send_base) % self.ring_size < self.window_size
 
     def has_packets_to_send(self):
-        return self.data_pointer <= len(self.data) - 1
+        return self.resumed_bytes is not None and self.payload_reader.has_next_payload()
 
     # for every event, log the window size and increment the time stamp
     def on_EOT_received(self):
@@ -145,67 +248,134 @@ class Sender:
 
         self.ack_logger.log(self.timestamp, packet_seq_num)
         self.N_logger.log(self.timestamp, self.window_size)
+        if self.metrics is not None:
+            self.metrics.on_event("duplicate_acks", self.now(), self.window_size)
         self.timestamp += 1
 
-    def on_new_ack_received(self, packet_seq_num):
+    def on_new_ack_received(self, packet_seq_num, rtt):
 
         self.ack_logger.log(self.timestamp, packet_seq_num)
-        self.increase_window_size_by_one()
+        self.congestion_control.on_packet_acked(rtt)
+        self.window_size = self.congestion_control.get_window_size()
 
         self.N_logger.log(self.timestamp, self.window_size)
+        if self.metrics is not None:
+            self.metrics.on_event("new_acks", self.now(), self.window_size)
+            if rtt is not None:
+                self.metrics.on_rtt_sample(rtt)
         self.timestamp += 1
 
     def on_sent_new_packet(self, packet_seq_num):
 
         self.seq_num_logger.log(self.timestamp, packet_seq_num)
         self.N_logger.log(self.timestamp, self.window_size)
+        if self.metrics is not None:
+            self.metrics.on_event("packets_sent", self.now(), self.window_size)
         self.timestamp += 1
 
     def on_delayed_retransmission(self, packet_seq_num):
 
         self.seq_num_logger.log(self.timestamp, packet_seq_num)
         self.N_logger.log(self.timestamp, self.window_size)
+        if self.metrics is not None:
+            self.metrics.on_event("delayed_retransmissions", self.now(), self.window_size)
+        self.timestamp += 1
+
+    def on_fast_retransmission(self, packet_seq_num):
+
+        self.seq_num_logger.log(self.timestamp, packet_seq_num)
+        self.N_logger.log(self.timestamp, self.window_size)
+        if self.metrics is not None:
+            self.metrics.on_event("fast_retransmissions", self.now(), self.window_size)
         self.timestamp += 1
 
     def on_time_out(self, packet_seq_num):
+        if packet_seq_num == RESUME_TIMER:
+            self.on_resume_time_out()
+            return
+        if packet_seq_num == EOT_TIMER:
+            self.on_EOT_time_out()
+            return
         # check if ack event arrives before the timeout event
         # else the packet is already acked
         if self.is_packet_not_acked(packet_seq_num):
-            # stop sending
-            self.window_size = 1
+            self.congestion_control.on_packet_lost(self.send_window.packet_numbers[packet_seq_num], timed_out=True)
+            self.window_size = self.congestion_control.get_window_size()
             self.N_logger.log(self.timestamp, self.window_size)
+            if self.metrics is not None:
+                self.metrics.on_event("timeouts", self.now(), self.window_size)
             if self.verbose:
                 print(f"Time-out Packet Seqnum: {packet_seq_num}")
                 print(f"Timestamp: {self.timestamp}")
 
             # check for immediate retransmission
             if packet_seq_num == self.send_base:
-                packet = self.packets_sent[packet_seq_num]
+                # back off once per loss of the oldest packet, not for every packet timing out with it
+                if self.rtt_estimator is not None:
+                    self.rtt_estimator.back_off()
+                packet = self.send_window.get_packet(packet_seq_num)
                 self.send_data_packet_start_timer(packet)
+                self.send_window.on_packet_retransmitted(packet_seq_num)
                 self.seq_num_logger.log(self.timestamp, packet_seq_num)
+                if self.metrics is not None:
+                    self.metrics.on_event("timeout_retransmissions", self.now(), self.window_size)
                 if self.verbose:
                     print(f"Immediate Retransmission Packet Seqnum: \n {packet}")
                     print(f"Timestamp: {self.timestamp}")
             else:
-                self.packets_timed_out.append(packet_seq_num)
-                print(f"Wait for Delayed Retransmission Packet Seqnum:  {packet_seq_num}")
-                print(f"Timestamp: {self.timestamp}")
+                self.send_window.mark_timed_out(packet_seq_num)
+                if self.verbose:
+                    print(f"Wait for Delayed Retransmission Packet Seqnum:  {packet_seq_num}")
+                    print(f"Timestamp: {self.timestamp}")
             self.timestamp += 1
 
-    def increase_window_size_by_one(self):
-
-        if self.window_size < MAX_WINDOW_SIZE:
-            self.window_size += 1
-        else:
-            self.window_size = MAX_WINDOW_SIZE
+    def send_resume_request(self):
+        self.resume_requested = True
+        self.transmit(Packet(RESUME, 0, 0, b"").encode())
+        self.start_timer(RESUME_TIMER)
+
+    def on_resume_time_out(self):
+        if self.resumed_bytes is None:
+            if self.rtt_estimator is not None:
+                self.rtt_estimator.back_off()
+            self.send_resume_request()
+
+    def process_resume_offer(self, delivered_bytes, checksum):
+        if self.resumed_bytes is not None:
+            return  # the reply to a retransmitted request
+        self.stop_timer(RESUME_TIMER)
+        length = self.payload_reader.length
+        if delivered_bytes > length or get_crc32(self.filename_to_send, self.file_offset, delivered_bytes) != checksum:
+            self.on_transfer_failed(RuntimeError(f"The {delivered_bytes} bytes delivered by the receiver are not "
+                                                 f"the start of {self.filename_to_send}, remove its checkpoint to "
+                                                 f"send the file again"))
+            return
+        self.payload_reader.close()
+        self.payload_reader = PayloadReader(self.filename_to_send, offset=self.file_offset + delivered_bytes,
+                                            length=length - delivered_bytes)
+        self.resumed_bytes = delivered_bytes
+        if self.verbose:
+            print(f"Resuming after the {delivered_bytes} bytes already delivered")
 
     def send_EOT(self):
         self.EOT_sent_event.set()
-        packet = Packet(EOT, 0, 0, "")
+        packet = Packet(EOT, 0, 0, b"")
         buffer = packet.encode()
-        sender.udp_socket.sendto(buffer, self.remote_addr)
+        self.transmit(buffer)
+        self.start_timer(EOT_TIMER)
         self.on_EOT_sent()
 
+    def on_EOT_time_out(self):
+        # the EOT or the receiver's EOT was lost, or the receiver is gone
+        if self.EOT_retransmissions == MAX_EOT_RETRANSMISSIONS:
+            self.on_transfer_failed(RuntimeError(f"No EOT from the receiver after {self.EOT_retransmissions + 1} "
+                                                 f"EOTs sent, the end of the transfer is not confirmed"))
+            return
+        self.EOT_retransmissions += 1
+        if self.rtt_estimator is not None:
+            self.rtt_estimator.back_off()
+        self.send_EOT()
+
     def on_EOT_sent(self):
         if self.verbose:
             print(f"Sent EOT at timestamp {self.timestamp}.")
@@ -214,38 +384,40 @@ class Sender:
         self.timestamp += 1
 
     def receive_packets(self):
-        if self.verbose:
-            print("Starting Receiving Packets")
-        while not self.EOT_received_event.is_set():
-            try:
-                packet_buffer = self.udp_socket.recv(PACKET_BYTE_LEN)
-                event_packet_received = (EVENT_PACKET_RECEIVED, packet_buffer)
-                self.event_queue.put(event_packet_received)
-            except socket.error:
-                pass  # the end of the transaction
-
-        if self.verbose:
-            print("Receiving Packets Thread Stopped")
+        # every datagram waiting on the socket, without blocking
+        try:
+            return self.batch_receiver.receive()
+        except OSError:
+            return []  # e.g. ICMP port unreachable before the emulator is up; the timers retransmit
 
     def process_received_packets(self, buffer):
-        if not isinstance(buffer, bytes):
-            raise RuntimeError("processPacket can only process a packet encoded as bytes")
-        packet = Packet(buffer)
-        typ, seqnum, length, data = packet.decode()
+        # Only the header is decoded: SACKs and EOTs carry no payload, RESUMEs a fixed one
+        typ, seqnum, _ = HEADER.unpack_from(buffer)
 
         if typ == SACK:
-            self.process_ack_packet(packet.seqnum)
+            self.process_ack_packet(seqnum)
             if self.areAllPacketsAcked():
-                sender.send_EOT()
+                self.send_EOT()
+        if typ == RESUME:
+            self.process_resume_offer(*RESUME_OFFER.unpack_from(buffer, HEADER.size))
         if typ == EOT:
             self.on_EOT_received()
             if self.areAllPacketsAcked() and self.EOT_sent_event.is_set():
-                self.EOT_received_event.set()  # Stop the receiving thread
-                sentinel_packet = Packet(DATA, 0, 0, "")
-                self.udp_socket.sendto(sentinel_packet.encode(), self.local_addr)  # sentinel
-                self.udp_socket.close()
+                self.stop_timer(EOT_TIMER)
+                self.on_transfer_completed()
+
+    def on_transfer_completed(self):
+        self.EOT_received_event.set()  # Stop the loop
+        # the sentinel wakes anything still blocked on the socket, the loop itself stops on the event
+        sentinel_packet = Packet(DATA, 0, 0, b"")
+        self.udp_socket.sendto(sentinel_packet.encode(), self.local_addr)  # sentinel
+        self.udp_socket.close()
+
+    def on_transfer_failed(self, error):
+        raise error
 
     def close(self):
+        self.payload_reader.close()
         self.seq_num_logger.close()
         self.ack_logger.close()
         self.N_logger.close()
@@ -255,54 +427,128 @@ class Sender:
         if self.is_packet_not_acked(packet_seq_num):
             if self.verbose:
                 print(f"Received New ACK Packet at timestamp {self.timestamp}; Packet Seq Num :{packet_seq_num}")
-            self.on_new_ack_received(packet_seq_num)
+            rtt = self.send_window.get_rtt_sample(packet_seq_num, self.now())
+            if rtt is not None and self.rtt_estimator is not None:
+                self.rtt_estimator.add_sample(rtt)
+            if rtt is not None:
+                self.update_most_recent_delivery(packet_seq_num, rtt)
+            self.on_new_ack_received(packet_seq_num, rtt)
 
             # Stop the timer
-            timer = self.timers[packet_seq_num]
-            timer.cancel()
+            self.stop_timer(packet_seq_num)
 
+            self.send_window.mark_acked(packet_seq_num)
+            if self.fast_retransmit:
+                self.fast_retransmit_lost_packets(packet_seq_num)
             if self.send_base == packet_seq_num:
                 self.slide_window()
-            else:
-                self.acked_packets.append(packet_seq_num)
         else:
             if self.verbose:
                 print(f"Received Duplicate ACK Packet at timestamp {self.timestamp}; Packet Seq Num :{packet_seq_num}")
             self.on_duplicate_ack_received(packet_seq_num)
+            if self.is_seq_num_acked_recently(packet_seq_num):
+                self.detect_spurious_retransmission(packet_seq_num)
+
+    def fast_retransmit_lost_packets(self, packet_seq_num):
+        # A packet is lost once FAST_RETRANSMIT_THRESHOLD packets sent after it have been acked,
+        # i.e. every unacked packet before the lowest of the FAST_RETRANSMIT_THRESHOLD highest acked packets,
+        # and it is older than the RTT of the most recently sent packet acked plus the reordering window.
+        # Packets are checked in order, so the first one still within the reordering window stops the check
+        # until the next ACK; the ones retransmitted on a timeout are left to their timer.
+        bisect.insort(self.highest_acked_packet_numbers, self.send_window.packet_numbers[packet_seq_num])
+        if len(self.highest_acked_packet_numbers) > FAST_RETRANSMIT_THRESHOLD:
+            self.highest_acked_packet_numbers.pop(0)
+        if len(self.highest_acked_packet_numbers) < FAST_RETRANSMIT_THRESHOLD or self.rack_sent_time is None:
+            return
+        lost_before = self.highest_acked_packet_numbers[0]
+        send_base_packet_number = self.data_pointer - (self.next_seq_num - self.send_base) % self.ring_size
+        lost_if_sent_before = self.now() - self.rack_rtt - self.reordering_window
+        packet_number = max(self.next_packet_number_to_check, send_base_packet_number)
+        while packet_number < lost_before:
+            lost_seq_num = packet_number % self.ring_size
+            if self.send_window.is_acked(lost_seq_num) or self.send_window.timed_out[lost_seq_num] == 1 \
+                    or self.send_window.retransmitted[lost_seq_num] == 1:
+                packet_number += 1
+                continue
+            sent_time = self.send_window.sent_times[lost_seq_num]
+            if sent_time > lost_if_sent_before or sent_time > self.rack_sent_time:
+                break  # may still arrive
+            self.congestion_control.on_packet_lost(packet_number, timed_out=False)
+            self.window_size = self.congestion_control.get_window_size()
+            packet = self.send_window.get_packet(lost_seq_num)
+            self.send_data_packet_start_timer(packet)
+            self.send_window.on_packet_retransmitted(lost_seq_num, fast=True)
+            if self.verbose:
+                print(f"Fast Retransmission Packet: \n {packet}")
+                print(f"Timestamp: {self.timestamp}")
+            self.on_fast_retransmission(lost_seq_num)
+            packet_number += 1
+        self.next_packet_number_to_check = max(self.next_packet_number_to_check, packet_number)
+
+    def update_most_recent_delivery(self, packet_seq_num, rtt):
+        sent_time = self.send_window.sent_times[packet_seq_num]
+        self.min_rtt = min(self.min_rtt, rtt)
+        self.max_rtt = max(self.max_rtt, rtt)
+        if self.rack_sent_time is None or sent_time >= self.rack_sent_time:
+            self.rack_sent_time = sent_time
+            self.rack_rtt = rtt
+        packet_number = self.send_window.packet_numbers[packet_seq_num]
+        if packet_number < self.highest_delivered_packet_number:
+            self.reordering_seen = True  # acked after a packet sent later
+        self.highest_delivered_packet_number = max(self.highest_delivered_packet_number, packet_number)
+        if self.reordering_seen:
+            # packets sent together arrive at most this far apart
+            self.reordering_window = max(self.reordering_window, self.max_rtt - self.min_rtt)
+
+    def detect_spurious_retransmission(self, packet_seq_num):
+        # The receiver acks every copy it gets: a second ACK of a fast-retransmitted packet means that the
+        # original was only reordered. The window cut is undone and later packets get more time to arrive:
+        # a quarter of the smoothed RTT, or of max_timeout until the RTT is measured, as in RACK.
+        if not self.send_window.on_spurious_retransmission(packet_seq_num):
+            return
+        self.congestion_control.on_spurious_loss(self.send_window.packet_numbers[packet_seq_num])
+        self.window_size = self.congestion_control.get_window_size()
+        srtt = self.max_timeout
+        if self.rtt_estimator is not None and self.rtt_estimator.srtt is not None:
+            srtt = self.rtt_estimator.srtt
+        self.reordering_window += srtt / 4
+        if self.metrics is not None:
+            self.metrics.on_event("spurious_retransmissions", self.now(), self.window_size)
+
+    def is_seq_num_acked_recently(self, packet_seq_num):
+        # acked in the window, or in the previous one, whose slots are not reused yet
+        if self.is_seq_num_in_flight(packet_seq_num):
+            return self.send_window.is_acked(packet_seq_num)
+        return 1 <= (self.send_base - packet_seq_num) % self.ring_size <= self.max_window_size
 
     def is_packet_not_acked(self, packet_seq_num):
-        return self.is_seq_num_in_max_window(packet_seq_num) and packet_seq_num not in self.acked_packets
+        return self.is_seq_num_in_flight(packet_seq_num) and not self.send_window.is_acked(packet_seq_num)
+
+    def is_seq_num_in_flight(self, packet_seq_num):
+        # sent but the send base has not moved past it yet
+        number_in_flight = (self.next_seq_num - self.send_base) % self.ring_size
+        return (packet_seq_num - self.send_base) % self.ring_size < number_in_flight
 
     def slide_window(self):
+        # the send base has just been acked
+        self.send_window.release(self.send_base)
+        self.send_base = get_next_seq_num(self.send_base, self.ring_size)
+        while self.send_window.is_acked(self.send_base):
+            self.send_window.release(self.send_base)
+            self.send_base = get_next_seq_num(self.send_base, self.ring_size)
         if self.verbose:
-            print(f"Current acked Packets: {self.acked_packets}")
-            next_send_base = get_next_seq_num(self.send_base)
-        while len(self.acked_packets) != 0 and next_send_base in self.acked_packets:
-            self.send_base = next_send_base
-            self.acked_packets.remove(next_send_base)
-            if self.verbose:
-                print(f"Window slided: new send-base :{self.send_base}")
-            next_send_base = get_next_seq_num(self.send_base)
-        self.send_base = get_next_seq_num(self.send_base)  # the next unacked packet
-
-    def is_seq_num_in_max_window(self, packet_seq_num):
-        if self.send_base <= RING_SIZE - MAX_WINDOW_SIZE:
-            max_window_end = self.send_base + MAX_WINDOW_SIZE - 1
-            return self.send_base <= packet_seq_num <= max_window_end
-        else:
-            max_window_end = MAX_WINDOW_SIZE - 1 - (RING_SIZE - self.send_base)
-            return packet_seq_num <= max_window_end or packet_seq_num >= self.send_base
+            print(f"Window slided: new send-base :{self.send_base}")
 
     def areAllPacketsAcked(self):
-        return self.send_base == self.next_seq_num and self.data_pointer == len(self.data)
+        return self.send_base == self.next_seq_num and not self.payload_reader.has_next_payload()
 
     def get_next_data(self):
-        payload = self.data[self.data_pointer]
+        payload = self.payload_reader.read_next_payload()
         self.data_pointer += 1
         return payload
 
     def increase_next_seq_num_by_one(self):
-        self.next_seq_num = get_next_seq_num(self.next_seq_num)
+        self.next_seq_num = get_next_seq_num(self.next_seq_num, self.ring_size)
 
 
 if __name__ == '__main__':
@@ -315,19 +561,75 @@ if __name__ == '__main__':
     parser.add_argument(dest="sender_recv_port", type=int, help="UDP port number used by the RDTSender to receiver "
                                                                 "SACKs"
                                                                 "from the emulator")
-    parser.add_argument(dest="max_timeout", type=int, help="timeout interval in units of millisecond")
+    parser.add_argument(dest="max_timeout", type=int, help="timeout interval in units of millisecond, used until "
+                                                           "the first RTT is measured and as its upper bound")
     parser.add_argument(dest="filename", type=str, help="name of the file to be transferred")
+    parser.add_argument("--ring_size", type=int, default=RING_SIZE,
+                        help="number of sequence numbers, must match the receiver")
+    parser.add_argument("--window_size", type=int, default=MAX_WINDOW_SIZE,
+                        help="maximum window size, at most half of the ring size, must match the receiver")
+    parser.add_argument("--max_rto", type=int, default=None,
+                        help="upper bound of the measured timeout and its backoff in units of millisecond, "
+                             "max_timeout by default")
+    parser.add_argument("--fixed_timeout", action="store_true",
+                        help="always wait max_timeout instead of measuring the RTT")
+    parser.add_argument("--congestion_control", choices=list(CONGESTION_CONTROLS), default="step",
+                        help="step: +1 per ACK and back to 1 on timeout, reno: slow start and AIMD, "
+                             "vegas: delay-based")
+    parser.add_argument("--no_fast_retransmit", action="store_true",
+                        help="only retransmit after a timeout, ignoring the gaps between the SACKs")
+    parser.add_argument("--metrics_file", type=str, default=None,
+                        help="append a JSON snapshot of the counters and histograms to this file periodically")
+    parser.add_argument("--metrics_port", type=int, default=None,
+                        help="serve the latest JSON snapshot of the metrics on this local TCP port")
+    parser.add_argument("--metrics_interval", type=float, default=1.0,
+                        help="seconds between two metrics snapshots")
+    parser.add_argument("--trace", type=str, default=None,
+                        help="write a binary trace to this file instead of the text logs, "
+                             "see trace_converter.py")
+    parser.add_argument("--file_offset", type=int, default=0,
+                        help="send the file from this byte offset, the receiver must write at the same offset")
+    parser.add_argument("--file_length", type=int, default=None,
+                        help="send at most this many bytes, the rest of the file by default")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip the bytes the receiver delivered in an earlier run, "
+                             "which it keeps when started with -resume")
+    parser.add_argument("--compress", action="store_true",
+                        help="send the file as a zlib stream, which the receiver decompresses on delivery")
 
     args = parser.parse_args()
 
+    metrics = None
+    metrics_exporters = []
+    if args.metrics_file is not None:
+        metrics_exporters.append(MetricsFileExporter(args.metrics_file))
+    if args.metrics_port is not None:
+        metrics_exporters.append(MetricsSocketExporter(args.metrics_port))
+    if len(metrics_exporters) != 0:
+        metrics = SenderMetrics(args.metrics_interval, metrics_exporters)
+
     sender = Sender(args.forward_recv_address,
                     args.forward_recv_port,
                     args.sender_recv_port,
                     args.max_timeout,
-                    args.filename, True)
+                    args.filename, True,
+                    ring_size=args.ring_size,
+                    max_window_size=args.window_size,
+                    adaptive_timeout=not args.fixed_timeout,
+                    max_rto=args.max_rto / 1000.0 if args.max_rto is not None else None,
+                    congestion_control=args.congestion_control,
+                    fast_retransmit=not args.no_fast_retransmit,
+                    trace_filename=args.trace,
+                    metrics=metrics,
+                    file_offset=args.file_offset,
+                    file_length=args.file_length,
+                    resume=args.resume,
+                    compress=args.compress)
 
     if sender.verbose:
         print("Starting RDTSender....")
         print(sender)
 
     sender.start()
+    for exporter in metrics_exporters:
+        exporter.close()
@@ -0,0 +1,87 @@
+"""
+The per-slot state of the packets in the send window.
+Every sequence number owns one slot of fixed-size arrays, so marking a packet as acked or timed out,
+and sliding the window over an acked packet, are O(1).
+Timed-out packets wait for their delayed retransmission in a heap ordered by packet number,
+so the ones that fit in the current window are always at the top.
+"""
+import heapq
+
+
+class SendWindow:
+    def __init__(self, ring_size):
+        self.ring_size = ring_size
+        self.packets = [None] * ring_size  # kept for retransmission
+        self.packet_numbers = [0] * ring_size  # position of the packet in the file, in payloads
+        self.sent_times = [0.0] * ring_size  # of the first transmission
+        self.retransmitted = bytearray(ring_size)
+        self.fast_retransmitted = bytearray(ring_size)  # until a second ACK shows that it was not lost
+        self.acked = bytearray(ring_size)
+        self.timed_out = bytearray(ring_size)
+        self.timed_out_heap = []  # (packet_number, seq_num)
+
+    def on_packet_sent(self, packet, packet_number, sent_time):
+        seq_num = packet.seqnum
+        self.packets[seq_num] = packet
+        self.packet_numbers[seq_num] = packet_number
+        self.sent_times[seq_num] = sent_time
+        self.retransmitted[seq_num] = 0
+        self.fast_retransmitted[seq_num] = 0
+        self.acked[seq_num] = 0
+        self.timed_out[seq_num] = 0
+
+    def on_packet_retransmitted(self, seq_num, fast=False):
+        self.retransmitted[seq_num] = 1
+        self.fast_retransmitted[seq_num] = 1 if fast else 0
+
+    def on_spurious_retransmission(self, seq_num):
+        """
+        Called on a second ACK of the packet: both of its copies arrived, so it was not lost.
+        Returns True for a fast retransmission, only once per packet.
+        """
+        was_fast = self.fast_retransmitted[seq_num] == 1
+        self.fast_retransmitted[seq_num] = 0
+        return was_fast
+
+    def get_rtt_sample(self, seq_num, now):
+        # Karn's rule: the ack of a retransmitted packet may belong to any of its transmissions
+        if self.retransmitted[seq_num] == 1:
+            return None
+        return now - self.sent_times[seq_num]
+
+    def get_packet(self, seq_num):
+        return self.packets[seq_num]
+
+    def is_acked(self, seq_num):
+        return self.acked[seq_num] == 1
+
+    def mark_acked(self, seq_num):
+        self.acked[seq_num] = 1
+        self.timed_out[seq_num] = 0
+
+    def mark_timed_out(self, seq_num):
+        self.timed_out[seq_num] = 1
+        heapq.heappush(self.timed_out_heap, (self.packet_numbers[seq_num], seq_num))
+
+    def release(self, seq_num):
+        # the send base moved past this slot
+        self.packets[seq_num] = None
+        self.acked[seq_num] = 0
+        self.timed_out[seq_num] = 0
+
+    def pop_timed_out_packet(self, is_seq_num_in_window):
+        """
+        Returns the seq num of the oldest timed-out packet if it is in the window, otherwise None.
+        The window starts at the send base, so if the oldest one is outside it, all others are too.
+        """
+        while len(self.timed_out_heap) != 0:
+            packet_number, seq_num = self.timed_out_heap[0]
+            if self.timed_out[seq_num] == 0 or self.packet_numbers[seq_num] != packet_number:
+                heapq.heappop(self.timed_out_heap)  # acked or retransmitted since
+            elif is_seq_num_in_window(seq_num):
+                heapq.heappop(self.timed_out_heap)
+                self.timed_out[seq_num] = 0
+                return seq_num
+            else:
+                return None
+        return None
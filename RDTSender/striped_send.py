@@ -0,0 +1,94 @@
+"""
+Sends one file as several contiguous ranges, each by its own Sender process on its own port and emulator path,
+so that one transfer uses several cores and paths at once.
+Every range needs a receiver started with -file_offset set to the range's offset: the receivers write their
+ranges in place into the same file, which is complete once every transfer has ended.
+Their -file_size sets the size of that file, so that nothing is left of an older, longer file.
+The ranges start on payload boundaries, so a receiver never has to merge the payloads of two senders.
+"""
+import argparse
+import math
+import multiprocessing
+import os
+
+from constants import PAY_LOAD_BYTE_LEN, RING_SIZE, MAX_WINDOW_SIZE
+from send import Sender
+
+
+def get_stripes(file_size, number_of_stripes, payload_len=PAY_LOAD_BYTE_LEN):
+    """
+    Splits the file into at most number_of_stripes (offset, length) ranges of whole payloads, as even as possible.
+    A file of fewer payloads than stripes gets one range per payload, the empty file one empty range.
+    """
+    number_of_payloads = math.ceil(file_size / payload_len)
+    number_of_stripes = max(1, min(number_of_stripes, number_of_payloads))
+    stripes = []
+    start = 0
+    for i in range(number_of_stripes):
+        end = number_of_payloads * (i + 1) // number_of_stripes
+        offset = start * payload_len
+        stripes.append((offset, min(end * payload_len, file_size) - offset))
+        start = end
+    return stripes
+
+
+def send_stripe(forward_recv_address, forward_recv_port, sender_recv_port, max_timeout, filename_to_send,
+                file_offset, file_length, sender_options):
+    # each stripe logs to its own directory, named after its receiving port
+    log_dir = f"logs_{sender_recv_port}"
+    os.makedirs(log_dir, exist_ok=True)
+    sender = Sender(forward_recv_address, forward_recv_port, sender_recv_port, max_timeout, filename_to_send,
+                    verbose=False, log_dir=log_dir, file_offset=file_offset, file_length=file_length,
+                    **sender_options)
+    sender.start()
+
+
+def send_striped(forward_recv_address, paths, max_timeout, filename_to_send, **sender_options):
+    """
+    Sends one stripe of filename_to_send per (forward_recv_port, sender_recv_port) of paths,
+    each in its own process, and waits for all of them.
+    sender_options are the keyword arguments of Sender, e.g. max_window_size or congestion_control.
+    """
+    stripes = get_stripes(os.path.getsize(filename_to_send), len(paths))
+    processes = []
+    for (forward_recv_port, sender_recv_port), (file_offset, file_length) in zip(paths, stripes):
+        process = multiprocessing.Process(target=send_stripe, args=(
+            forward_recv_address, forward_recv_port, sender_recv_port, max_timeout, filename_to_send,
+            file_offset, file_length, sender_options))
+        process.start()
+        processes.append(process)
+    for process in processes:
+        process.join()
+    failed = [i for i, process in enumerate(processes) if process.exitcode != 0]
+    if len(failed) != 0:
+        raise RuntimeError(f"The senders of the stripes {failed} failed")
+    return stripes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="send one file as several ranges, one sender process per range")
+    parser.add_argument(dest="forward_recv_address", type=str, help="host address of the network emulators")
+    parser.add_argument(dest="max_timeout", type=int, help="timeout interval in units of millisecond")
+    parser.add_argument(dest="filename", type=str, help="name of the file to be transferred")
+    parser.add_argument(dest="paths", nargs="+", type=str,
+                        help="one <forward_recv_port>:<sender_recv_port> per stripe, in file order")
+    parser.add_argument("--ring_size", type=int, default=RING_SIZE,
+                        help="number of sequence numbers, must match the receivers")
+    parser.add_argument("--window_size", type=int, default=MAX_WINDOW_SIZE,
+                        help="maximum window size, at most half of the ring size, must match the receivers")
+    parser.add_argument("--print_stripes", action="store_true",
+                        help="only print the receiver flags and length of every stripe, to start the receivers")
+    args = parser.parse_args()
+
+    paths = []
+    for path in args.paths:
+        forward_recv_port, sender_recv_port = path.split(":", 1)
+        paths.append((int(forward_recv_port), int(sender_recv_port)))
+
+    if args.print_stripes:
+        file_size = os.path.getsize(args.filename)
+        for (forward_recv_port, _), (offset, length) in zip(paths, get_stripes(file_size, len(paths))):
+            print(f"{forward_recv_port} -file_offset={offset} -file_size={file_size} ({length} bytes)")
+    else:
+        send_striped(args.forward_recv_address, paths, args.max_timeout, args.filename, ring_size=args.ring_size,
+                     max_window_size=args.window_size)
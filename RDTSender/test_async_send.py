@@ -0,0 +1,88 @@
+import asyncio
+import tempfile
+from unittest import TestCase
+
+from RDTSender.async_send import send_file
+from RDTSender.constants import SACK, DATA, EOT, RESUME, MAX_EOT_RETRANSMISSIONS
+from RDTSender.packet import Packet, RESUME_OFFER
+
+
+class AckEverythingReceiver(asyncio.DatagramProtocol):
+    """
+    Acks every data packet back to the sender it came from and stores the payloads in order.
+    """
+
+    def __init__(self, EOTs_to_ignore=0, delivered_bytes=0, checksum=0):
+        self.transport = None
+        self.payloads = {}
+        self.EOTs_to_ignore = EOTs_to_ignore  # as if these EOTs were lost
+        self.resume_offer = RESUME_OFFER.pack(delivered_bytes, checksum)
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        packet = Packet(data)
+        if packet.typ == DATA:
+            self.payloads.setdefault(addr[1], []).append(packet.data)
+            self.transport.sendto(Packet(SACK, packet.seqnum, 0, b"").encode(), addr)
+        elif packet.typ == RESUME:
+            self.transport.sendto(Packet(RESUME, 0, RESUME_OFFER.size, self.resume_offer).encode(), addr)
+        elif packet.typ == EOT and self.EOTs_to_ignore > 0:
+            self.EOTs_to_ignore -= 1
+        elif packet.typ == EOT:
+            self.transport.sendto(Packet(EOT, 0, 0, b"").encode(), addr)
+
+
+class TestAsyncSender(TestCase):
+    def test_concurrent_transfers(self):
+        async def send_all(log_dir):
+            loop = asyncio.get_running_loop()
+            transport, receiver = await loop.create_datagram_endpoint(AckEverythingReceiver,
+                                                                      local_addr=("127.0.0.1", 0))
+            receiver_port = transport.get_extra_info("sockname")[1]
+            senders = await asyncio.gather(*[
+                send_file("127.0.0.1", receiver_port, 0, 200, "fileSent8Packets.txt", log_dir=log_dir)
+                for _ in range(20)
+            ])
+            transport.close()
+            return senders, receiver
+
+        with tempfile.TemporaryDirectory() as log_dir:
+            senders, receiver = asyncio.run(asyncio.wait_for(send_all(log_dir), 10))
+
+        with open("fileSent8Packets.txt", "rb") as file:
+            content = file.read()
+        assert len(receiver.payloads) == 20
+        for payloads in receiver.payloads.values():
+            assert b"".join(payloads) == content
+        for sender in senders:
+            assert sender.EOT_received_event.is_set()
+            assert sender.areAllPacketsAcked()
+
+    def send_to(self, receiver, **sender_options):
+        async def send(log_dir):
+            loop = asyncio.get_running_loop()
+            transport, _ = await loop.create_datagram_endpoint(lambda: receiver, local_addr=("127.0.0.1", 0))
+            receiver_port = transport.get_extra_info("sockname")[1]
+            try:
+                return await send_file("127.0.0.1", receiver_port, 0, 50, "fileSent8Packets.txt", log_dir=log_dir,
+                                       verbose=False, **sender_options)
+            finally:
+                transport.close()
+
+        with tempfile.TemporaryDirectory() as log_dir:
+            return asyncio.run(asyncio.wait_for(send(log_dir), 10))
+
+    def test_lost_EOT_retransmitted(self):
+        sender = self.send_to(AckEverythingReceiver(EOTs_to_ignore=2))
+        assert sender.EOT_received_event.is_set()
+        assert sender.EOT_retransmissions == 2
+
+    def test_unanswered_EOT_fails(self):
+        with self.assertRaises(RuntimeError):
+            self.send_to(AckEverythingReceiver(EOTs_to_ignore=MAX_EOT_RETRANSMISSIONS + 1))
+
+    def test_resume_refuses_another_file(self):
+        with self.assertRaises(RuntimeError):
+            self.send_to(AckEverythingReceiver(delivered_bytes=100, checksum=1), resume=True)
@@ -0,0 +1,48 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from RDTSender.benchmark import get_percentile, find_regressions, run_benchmark, create_file
+
+
+class TestBenchmark(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert get_percentile(values, 50) == 50
+        assert get_percentile(values, 99) == 99
+        assert get_percentile([3], 99) == 3
+        assert get_percentile([], 50) is None
+
+    def test_loopback_run(self):
+        configuration = {"transport": "loopback", "file_packets": 100, "ring_size": 32, "window_size": 10,
+                         "timeout": 400, "delay": 50, "drop": 0.1, "congestion_control": "reno", "compression": "none",
+                         "file_content": "random", "seed": 0}
+        with tempfile.TemporaryDirectory() as directory:
+            filename = create_file(directory, 100)
+            assert os.path.getsize(filename) == 100 * 500
+            results = run_benchmark(configuration, filename)
+            assert results == run_benchmark(configuration, filename) | {"cpu_time": results["cpu_time"]}
+        assert results["completion_time"] > 0
+        assert results["retransmission_ratio"] > 0
+        assert results["latency_p50"] <= results["latency_p99"]
+
+    def test_compressed_loopback_run(self):
+        configuration = {"transport": "loopback", "file_packets": 100, "ring_size": 32, "window_size": 10,
+                         "timeout": 400, "delay": 50, "drop": 0.1, "congestion_control": "reno",
+                         "compression": "zlib", "file_content": "text", "seed": 0}
+        with tempfile.TemporaryDirectory() as directory:
+            filename = create_file(directory, 100, "text")
+            assert os.path.getsize(filename) == 100 * 500
+            results = run_benchmark(configuration, filename)
+            uncompressed_results = run_benchmark(configuration | {"compression": "none"}, filename)
+        # fewer bytes on the wire for the same file
+        assert results["wire_throughput"] < results["goodput"]
+        assert results["completion_time"] < uncompressed_results["completion_time"]
+
+    def test_regressions(self):
+        configuration = {"transport": "loopback", "seed": 0}
+        baseline = [{"configuration": configuration, "results": {"completion_time": 1.0}}]
+        assert find_regressions([{"configuration": configuration, "results": {"completion_time": 1.05}}],
+                                baseline, 0.1) == []
+        assert len(find_regressions([{"configuration": configuration, "results": {"completion_time": 1.2}}],
+                                    baseline, 0.1)) == 1
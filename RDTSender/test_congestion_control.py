@@ -0,0 +1,62 @@
+from unittest import TestCase
+
+from RDTSender.congestion_control import RenoControl, StepControl, VegasControl
+
+
+class TestCongestionControl(TestCase):
+    def test_reno_slow_start_then_one_loss_per_window(self):
+        control = RenoControl(100)
+        for packet_number in range(40):
+            control.on_packet_sent(packet_number)
+            control.on_packet_acked(0.1)
+        assert control.get_window_size() == 41
+        control.on_packet_lost(39, timed_out=False)
+        assert control.get_window_size() == 20
+        control.on_packet_lost(30, timed_out=True)  # sent before the window was halved
+        assert control.get_window_size() == 20
+        control.on_packet_sent(40)
+        control.on_packet_lost(40, timed_out=True)
+        assert control.get_window_size() == 1
+
+    def test_reno_undoes_a_spurious_congestion_event(self):
+        control = RenoControl(100)
+        for packet_number in range(40):
+            control.on_packet_sent(packet_number)
+            control.on_packet_acked(0.1)
+        control.on_packet_lost(38, timed_out=False)
+        control.on_packet_lost(39, timed_out=False)
+        assert control.get_window_size() == 20
+        control.on_spurious_loss(39)
+        assert control.get_window_size() == 20  # 38 may still be lost
+        control.on_spurious_loss(38)
+        assert control.get_window_size() == 41
+        assert control.slow_start_threshold == 64
+        control.on_packet_sent(40)
+        control.on_packet_lost(40, timed_out=True)
+        control.on_spurious_loss(40)
+        assert control.get_window_size() == 1
+
+    def test_step_resets_on_every_timeout(self):
+        control = StepControl(10)
+        for _ in range(20):
+            control.on_packet_acked(None)
+        assert control.get_window_size() == 10
+        control.on_packet_lost(0, timed_out=True)
+        assert control.get_window_size() == 1
+
+    def test_vegas_stops_growing_when_rtt_grows(self):
+        control = VegasControl(100)
+        for _ in range(15):
+            control.on_packet_acked(0.1)  # four rounds of slow start
+        window_size = control.get_window_size()
+        assert window_size == 16
+        for _ in range(60):
+            control.on_packet_acked(0.2)
+        assert control.get_window_size() < window_size
+
+    def test_vegas_ignores_random_delays(self):
+        # every round has one quick packet, as on a link with random delays but no queue
+        control = VegasControl(64)
+        for _ in range(200):
+            control.on_packet_acked(0.1 if control.round_acks == 0 else 0.3)
+        assert control.get_window_size() == 64
@@ -0,0 +1,47 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from RDTSender.constants import DATA
+from RDTSender.event_trace import TraceWriter, TraceLogger, read_trace, EVENT_SENT, EVENT_ACK, EVENT_WINDOW, \
+    EVENT_DROP
+from RDTSender.trace_converter import convert_trace
+
+
+class TestEventTrace(TestCase):
+    def test_converted_trace_matches_text_logs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            trace_filename = os.path.join(directory, "sender.trace")
+            trace_writer = TraceWriter(trace_filename)
+            seq_num_logger = TraceLogger(trace_writer, EVENT_SENT, lambda: 1)
+            N_logger = TraceLogger(trace_writer, EVENT_WINDOW, lambda: 1)
+            ack_logger = TraceLogger(trace_writer, EVENT_ACK, lambda: 1)
+            N_logger.log(0, 1)
+            # more records than fit in the buffer
+            for timestamp in range(1, 5000):
+                seq_num_logger.log(timestamp, timestamp % 32)
+                ack_logger.log(timestamp, timestamp % 32)
+            seq_num_logger.log(5000, "EOT")
+            ack_logger.log(5001, "EOT")
+            for logger in (seq_num_logger, N_logger, ack_logger):
+                logger.close()
+
+            convert_trace(trace_filename, directory)
+            with open(os.path.join(directory, "seqnum.log")) as file:
+                assert file.read().splitlines() == [f"t={t} {t % 32}" for t in range(1, 5000)] + ["t=5000 EOT"]
+            with open(os.path.join(directory, "ack.log")) as file:
+                assert file.read().splitlines() == [f"t={t} {t % 32}" for t in range(1, 5000)] + ["t=5001 EOT"]
+            with open(os.path.join(directory, "N.log")) as file:
+                assert file.read() == "t=0 1\n"
+
+    def test_emulator_records(self):
+        with tempfile.TemporaryDirectory() as directory:
+            trace_filename = os.path.join(directory, "emulator.trace")
+            trace_writer = TraceWriter(trace_filename)
+            trace_writer.write(123, EVENT_DROP, DATA, 7, 0)
+            trace_writer.close()
+            assert list(read_trace(trace_filename)) == [(123, EVENT_DROP, DATA, 7, 0)]
+
+            convert_trace(trace_filename, directory)
+            with open(os.path.join(directory, "emulator.log")) as file:
+                assert file.read() == "t=123 DROP DATA 7 0\n"
@@ -0,0 +1,30 @@
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+from RDTSender.logger import LoggerTimeStamped
+
+
+class TestLoggerTimeStamped(TestCase):
+    def test_records_written_in_order_on_close(self):
+        with tempfile.TemporaryDirectory() as directory:
+            logger = LoggerTimeStamped(os.path.join(directory, "seqnum"))
+            for timestamp in range(20000):
+                logger.log(timestamp, timestamp % 32)
+            logger.log(20000, "EOT")
+            logger.close()
+            with open(os.path.join(directory, "seqnum.log")) as file:
+                lines = file.read().splitlines()
+        assert lines[:2] == ["t=0 0", "t=1 1"]
+        assert lines[-1] == "t=20000 EOT"
+        assert lines == [f"t={t} {t % 32}" for t in range(20000)] + ["t=20000 EOT"]
+
+    def test_background_flush(self):
+        with tempfile.TemporaryDirectory() as directory:
+            logger = LoggerTimeStamped(os.path.join(directory, "N"))
+            logger.log(0, 1)
+            time.sleep(0.5)
+            with open(os.path.join(directory, "N.log")) as file:
+                assert file.read() == "t=0 1\n"
+            logger.close()
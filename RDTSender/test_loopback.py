@@ -0,0 +1,65 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from RDTSender.loopback import LoopbackTransfer
+from RDTSender.metrics import SenderMetrics
+
+FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fileSent45Packets.txt")
+
+
+class TestLoopbackTransfer(TestCase):
+    def run_transfer(self, **options):
+        with tempfile.TemporaryDirectory() as log_dir:
+            transfer = LoopbackTransfer(FILENAME, 400, 100, 0.3, log_dir=log_dir, **options)
+            virtual_time = transfer.run()
+            with open(os.path.join(log_dir, "seqnum.log")) as file:
+                seq_num_log = file.read()
+        return transfer, virtual_time, seq_num_log
+
+    def test_file_received_under_loss(self):
+        transfer, virtual_time, seq_num_log = self.run_transfer(seed=1)
+        with open(FILENAME, "rb") as file:
+            assert transfer.receiver.file_received == file.read()
+        assert transfer.forward_link.packets_dropped > 0
+        assert virtual_time > 0
+        assert seq_num_log.endswith("EOT\n")
+
+    def test_same_seed_same_transfer(self):
+        _, first_time, first_log = self.run_transfer(seed=2, congestion_control="vegas")
+        _, second_time, second_log = self.run_transfer(seed=2, congestion_control="vegas")
+        assert first_time == second_time
+        assert first_log == second_log
+
+    def test_large_window(self):
+        transfer, _, _ = self.run_transfer(seed=3, ring_size=256, max_window_size=64)
+        with open(FILENAME, "rb") as file:
+            assert transfer.receiver.file_received == file.read()
+
+    def test_no_fast_retransmission_on_reordering_link(self):
+        # without loss, every packet that arrives after later ones was only reordered by the random delays
+        for seed in range(5):
+            with tempfile.TemporaryDirectory() as log_dir:
+                transfer = LoopbackTransfer(FILENAME, 400, 100, 0, seed=seed, log_dir=log_dir, metrics=SenderMetrics())
+                transfer.run()
+            assert transfer.sender.reordering_seen
+            assert transfer.sender.metrics.counters["fast_retransmissions"] == 0
+
+    def test_resume_after_delivered_bytes(self):
+        with open(FILENAME, "rb") as file:
+            content = file.read()
+        transfer, _, _ = self.run_transfer(seed=4, resume=True, delivered=content[:12345])
+        assert transfer.receiver.file_received == content
+        assert transfer.sender.resumed_bytes == 12345
+        # only the rest of the file was sent, from the middle of a payload on
+        assert transfer.sender.data_pointer == -(-(len(content) - 12345) // 500)
+
+    def test_resume_refuses_another_file(self):
+        with self.assertRaises(RuntimeError):
+            self.run_transfer(seed=5, resume=True, delivered=b"not the start of the file")
+
+    def test_resume_from_an_empty_receiver(self):
+        transfer, _, _ = self.run_transfer(seed=6, resume=True)
+        with open(FILENAME, "rb") as file:
+            assert transfer.receiver.file_received == file.read()
+        assert transfer.sender.resumed_bytes == 0
@@ -0,0 +1,65 @@
+import json
+import os
+import socket
+import tempfile
+from unittest import TestCase
+
+from RDTSender.loopback import LoopbackTransfer
+from RDTSender.metrics import Histogram, SenderMetrics, MetricsFileExporter, MetricsSocketExporter
+
+FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fileSent45Packets.txt")
+
+
+class TestMetrics(TestCase):
+    def test_histogram(self):
+        histogram = Histogram([1, 2, 4, 8])
+        for value in [0.5, 1.5, 3, 3, 100]:
+            histogram.add(value)
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 5
+        assert snapshot["min"] == 0.5 and snapshot["max"] == 100
+        assert snapshot["p50"] == 4
+        assert snapshot["p99"] == 100
+        assert snapshot["buckets"] == {"1": 1, "2": 1, "4": 2, "inf": 1}
+
+    def test_counters_of_a_transfer(self):
+        snapshots = []
+        with tempfile.TemporaryDirectory() as log_dir:
+            metrics = SenderMetrics(report_interval=1.0, callbacks=[snapshots.append])
+            transfer = LoopbackTransfer(FILENAME, 400, 100, 0.2, seed=1, log_dir=log_dir, metrics=metrics)
+            transfer.run()
+        counters = metrics.snapshot()["counters"]
+        assert counters["packets_sent"] == 45
+        assert counters["new_acks"] == 45
+        retransmissions = counters["delayed_retransmissions"] + counters["fast_retransmissions"] + \
+            counters["timeout_retransmissions"]
+        assert retransmissions > 0
+        assert metrics.rtt.count > 0
+        assert len(snapshots) > 1
+        assert snapshots[-1]["counters"] == counters
+        json.dumps(snapshots[-1])
+
+    def test_exporters(self):
+        metrics = SenderMetrics()
+        metrics.on_event("packets_sent", 0.0, 1)
+        with tempfile.TemporaryDirectory() as directory:
+            file_exporter = MetricsFileExporter(os.path.join(directory, "metrics.jsonl"))
+            file_exporter(metrics.snapshot())
+            file_exporter.close()
+            # a second run appends to the same file
+            file_exporter = MetricsFileExporter(os.path.join(directory, "metrics.jsonl"))
+            file_exporter(metrics.snapshot())
+            file_exporter.close()
+            with open(os.path.join(directory, "metrics.jsonl")) as file:
+                lines = file.readlines()
+            assert len(lines) == 2
+            assert all(json.loads(line)["counters"]["packets_sent"] == 1 for line in lines)
+
+        socket_exporter = MetricsSocketExporter(0)
+        socket_exporter(metrics.snapshot())
+        with socket.create_connection(socket_exporter.server_socket.getsockname()) as connection:
+            received = b""
+            while not received.endswith(b"\n"):
+                received += connection.recv(4096)
+        socket_exporter.close()
+        assert json.loads(received)["window_sizes"] == [[0.0, 1]]
@@ -0,0 +1,10 @@
+from unittest import TestCase
+
+from RDTSender.packet import Packet
+
+
+class TestPacket(TestCase):
+    def test_binary_round_trip(self):
+        data = bytes(range(256)) + b"\x00" * 244
+        packet = Packet(Packet(1, 31, len(data), data).encode())
+        assert packet.decode() == (1, 31, 500, data)
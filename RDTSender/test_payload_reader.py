@@ -0,0 +1,58 @@
+import os
+import tempfile
+import zlib
+from unittest import TestCase
+
+from RDTSender.payload_reader import PayloadReader, get_crc32
+
+
+class TestPayloadReader(TestCase):
+    def read_all_payloads(self, content, payload_len, **range_options):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "file.txt")
+            with open(filename, "wb") as file:
+                file.write(content)
+            reader = PayloadReader(filename, payload_len, **range_options)
+            payloads = []
+            while reader.has_next_payload():
+                payloads.append(reader.read_next_payload())
+            reader.close()
+            return reader.number_of_payloads, payloads
+
+    def test_payloads_in_order(self):
+        assert self.read_all_payloads(b"abcdefg", 3) == (3, [b"abc", b"def", b"g"])
+        assert self.read_all_payloads(b"abcdef", 3) == (2, [b"abc", b"def"])
+
+    def test_empty_file_is_one_empty_payload(self):
+        assert self.read_all_payloads(b"", 3) == (1, [b""])
+
+    def test_binary_payloads(self):
+        content = bytes(range(256)) * 3
+        number_of_payloads, payloads = self.read_all_payloads(content, 500)
+        assert number_of_payloads == 2
+        assert b"".join(payloads) == content
+
+    def test_range_of_the_file(self):
+        assert self.read_all_payloads(b"abcdefghij", 3, offset=2, length=5) == (2, [b"cde", b"fg"])
+        assert self.read_all_payloads(b"abcdefghij", 3, offset=6) == (2, [b"ghi", b"j"])
+        assert self.read_all_payloads(b"abcdefghij", 3, offset=9, length=5) == (1, [b"j"])
+        assert self.read_all_payloads(b"abcdefghij", 3, offset=10) == (1, [b""])
+        with self.assertRaises(RuntimeError):
+            self.read_all_payloads(b"abcdefghij", 3, offset=11)
+
+    def test_crc32_of_a_range(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "file.txt")
+            with open(filename, "wb") as file:
+                file.write(b"abcdefghij")
+            assert get_crc32(filename, 2, 5, chunk_len=2) == zlib.crc32(b"cdefg")
+            assert get_crc32(filename, 0, 0) == 0
+
+    def test_compressed_payloads(self):
+        content = b"abc" * 10000 + bytes(range(256)) * 20
+        number_of_payloads, payloads = self.read_all_payloads(content, 500, compress=True)
+        assert number_of_payloads == 71  # before compression
+        assert all(len(payload) == 500 for payload in payloads[:-1])
+        assert zlib.decompress(b"".join(payloads)) == content
+        _, payloads = self.read_all_payloads(b"", 500, compress=True)
+        assert zlib.decompress(b"".join(payloads)) == b""
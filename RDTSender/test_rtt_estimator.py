@@ -0,0 +1,23 @@
+from unittest import TestCase
+
+from RDTSender.rtt_estimator import RttEstimator
+
+
+class TestRttEstimator(TestCase):
+    def test_timeout_follows_samples(self):
+        estimator = RttEstimator(0.4)
+        assert estimator.get_timeout() == 0.4
+        estimator.add_sample(0.1)
+        assert abs(estimator.get_timeout() - (0.1 + 4 * 0.05)) < 1e-9
+        for _ in range(50):
+            estimator.add_sample(0.1)
+        assert estimator.get_timeout() < 0.11
+
+    def test_backoff_is_bounded_and_reset_by_a_sample(self):
+        estimator = RttEstimator(0.4, max_timeout=1.0)
+        estimator.back_off()
+        assert estimator.get_timeout() == 0.8
+        estimator.back_off()
+        assert estimator.get_timeout() == 1.0
+        estimator.add_sample(0.1)
+        assert estimator.get_timeout() < 0.4
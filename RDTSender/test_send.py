@@ -1,12 +1,96 @@
+import tempfile
 from unittest import TestCase
 
 from RDTSender.send import Sender
 
 
 class TestSender(TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.senders = []
+
+    def tearDown(self):
+        for sender in self.senders:
+            sender.selector.close()
+            sender.udp_socket.close()
+            sender.close()
+        self.log_dir.cleanup()
+
+    def create_sender(self, **options):
+        # on any free port, logging to a temporary directory
+        sender = Sender("", 12, 0, 12, "fileSent8Packets.txt", log_dir=self.log_dir.name, **options)
+        self.senders.append(sender)
+        return sender
+
     def test_slide_window(self):
-        sender = Sender("", 12, 13, 12, "fileSent8Packets.txt")
-        sender.acked_packets = [24, 25, 26, 27, 28, 29, 30, 31, 0]
+        sender = self.create_sender()
+        for seq_num in [24, 25, 26, 27, 28, 29, 30, 31, 0]:
+            sender.send_window.mark_acked(seq_num)
         sender.send_base = 23
         sender.slide_window()
         assert sender.send_base == 1
+        assert not sender.send_window.is_acked(0)
+
+    def test_window_wraps_around_configured_ring(self):
+        sender = self.create_sender(ring_size=1024, max_window_size=256)
+        sender.send_base = 1000
+        sender.window_size = 100
+        assert sender.is_seq_num_in_window(1023)
+        assert sender.is_seq_num_in_window(75)
+        assert not sender.is_seq_num_in_window(76)
+
+    def test_window_at_most_half_of_ring(self):
+        with self.assertRaises(RuntimeError):
+            self.create_sender(ring_size=32, max_window_size=17)
+
+    def test_delayed_retransmission_in_packet_order(self):
+        sender = self.create_sender()
+        sender.window_size = 4
+        sender.send_new_packets_in_window()
+        sender.on_time_out(3)
+        sender.on_time_out(1)  # the window shrinks to 1
+        assert sender.send_window.pop_timed_out_packet(sender.is_seq_num_in_window) is None
+        sender.window_size = 2
+        assert sender.send_window.pop_timed_out_packet(sender.is_seq_num_in_window) == 1
+        assert sender.send_window.pop_timed_out_packet(sender.is_seq_num_in_window) is None
+        sender.process_ack_packet(3)
+        sender.window_size = 4
+        assert sender.send_window.pop_timed_out_packet(sender.is_seq_num_in_window) is None
+
+    def test_fast_retransmit_after_three_later_sacks(self):
+        sender = self.create_sender()
+        sender.window_size = 6
+        sender.send_new_packets_in_window()
+        sender.process_ack_packet(2)
+        sender.process_ack_packet(3)
+        assert sender.send_window.retransmitted[0] == 0
+        sender.process_ack_packet(4)
+        assert sender.send_window.retransmitted[0] == 1
+        assert sender.send_window.retransmitted[1] == 1
+        assert sender.send_window.retransmitted[5] == 0
+        assert sender.send_base == 0
+
+    def test_spurious_fast_retransmission_undone(self):
+        sender = self.create_sender(congestion_control="reno")
+        sender.window_size = 6
+        sender.congestion_control.cwnd = 6
+        sender.send_new_packets_in_window()
+        for seq_num in [1, 2, 3]:
+            sender.process_ack_packet(seq_num)
+        assert sender.send_window.retransmitted[0] == 1
+        assert sender.window_size == 4  # halved after the three new ACKs
+        sender.process_ack_packet(0)  # the original arrives after all
+        sender.process_ack_packet(0)  # and so does the retransmission
+        assert sender.window_size == 9
+        assert sender.reordering_window > 0
+
+    def test_no_fast_retransmission_within_reordering_window(self):
+        sender = self.create_sender()
+        sender.window_size = 8
+        sender.send_new_packets_in_window()
+        sender.reordering_seen = True
+        sender.reordering_window = 10.0  # e.g. the RTTs measured range over 10 s
+        for seq_num in [1, 2, 3, 4, 5]:
+            sender.process_ack_packet(seq_num)
+        assert sender.send_window.retransmitted[0] == 0
+        assert sender.send_base == 0
@@ -0,0 +1,30 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from RDTSender.loopback import LoopbackTransfer
+from RDTSender.striped_send import get_stripes
+
+FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fileSent45Packets.txt")
+
+
+class TestStripedSend(TestCase):
+    def test_stripes_of_whole_payloads(self):
+        assert get_stripes(2200, 2, 500) == [(0, 1000), (1000, 1200)]
+        assert get_stripes(2000, 4, 500) == [(0, 500), (500, 500), (1000, 500), (1500, 500)]
+        assert get_stripes(700, 3, 500) == [(0, 500), (500, 200)]
+        assert get_stripes(0, 3, 500) == [(0, 0)]
+
+    def test_stripes_reassembled_by_offset(self):
+        # one in-memory transfer per stripe, the received ranges written at their offsets
+        file_size = os.path.getsize(FILENAME)
+        reassembled = bytearray(file_size)
+        with tempfile.TemporaryDirectory() as log_dir:
+            for seed, (offset, length) in enumerate(get_stripes(file_size, 3)):
+                transfer = LoopbackTransfer(FILENAME, 400, 100, 0.2, seed=seed, log_dir=log_dir,
+                                            file_offset=offset, file_length=length)
+                transfer.run()
+                assert len(transfer.receiver.file_received) == length
+                reassembled[offset:offset + length] = transfer.receiver.file_received
+        with open(FILENAME, "rb") as file:
+            assert reassembled == file.read()
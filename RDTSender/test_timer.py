@@ -0,0 +1,27 @@
+from unittest import TestCase
+
+from RDTSender.timer import TimerScheduler
+
+
+class TestTimerScheduler(TestCase):
+    def test_expired_timers_in_deadline_order(self):
+        scheduler = TimerScheduler()
+        scheduler.start_timer(3, 2.0)
+        scheduler.start_timer(1, 1.0)
+        scheduler.start_timer(2, 5.0)
+        assert scheduler.get_next_deadline() == 1.0
+        assert scheduler.pop_expired_timers(3.0) == [1, 3]
+        assert scheduler.get_next_deadline() == 5.0
+
+    def test_cancelled_and_rearmed_timers(self):
+        scheduler = TimerScheduler()
+        scheduler.start_timer(1, 1.0)
+        scheduler.start_timer(2, 1.0)
+        scheduler.cancel_timer(1)
+        scheduler.start_timer(2, 5.0)  # re-arm
+        assert scheduler.get_next_deadline() == 5.0
+        assert scheduler.pop_expired_timers(4.0) == []
+        assert scheduler.is_timer_running(2)
+        assert not scheduler.is_timer_running(1)
+        scheduler.cancel_timer(2)
+        assert scheduler.get_next_deadline() is None
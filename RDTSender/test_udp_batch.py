@@ -0,0 +1,27 @@
+import socket
+from unittest import TestCase
+from unittest.mock import patch
+
+from RDTSender import udp_batch
+from RDTSender.udp_batch import BatchSender, BatchReceiver
+
+
+class TestUdpBatch(TestCase):
+    def send_and_receive(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as receiving_socket, \
+                socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sending_socket:
+            receiving_socket.bind(("127.0.0.1", 0))
+            receiver = BatchReceiver(receiving_socket, 4, 512)
+            assert receiver.receive() == []
+            datagrams = [bytes([i]) * (i + 1) for i in range(10)]
+            BatchSender(sending_socket, receiving_socket.getsockname(), 4).send(datagrams)
+            return datagrams, receiver.receive()
+
+    def test_batches(self):
+        datagrams, received = self.send_and_receive()
+        assert received == datagrams
+
+    def test_fallback(self):
+        with patch.object(udp_batch, "libc_sendmmsg", None), patch.object(udp_batch, "libc_recvmmsg", None):
+            datagrams, received = self.send_and_receive()
+        assert received == datagrams
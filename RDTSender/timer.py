@@ -0,0 +1,48 @@
+"""
+A retransmission timer for the RDTSender.
+All the packet timers live in one min-heap ordered by deadline. The heap has no thread of its own:
+the sender's main loop blocks until the earliest deadline and then pops the expired timers.
+Arming a timer is O(log n) and cancelling it is O(1), as a cancelled (or re-armed) timer is not
+removed from the heap, it is only marked as stale and dropped when it reaches the top.
+"""
+import heapq
+
+
+class TimerScheduler:
+    def __init__(self):
+        self.heap = []  # (deadline, generation, seq_num)
+        self.live_timers = {}  # seq_num -> generation of the armed timer
+        self.generation = 0
+
+    def start_timer(self, seq_num, deadline):
+        # re-arming a timer makes the older heap entry stale
+        self.generation += 1
+        self.live_timers[seq_num] = self.generation
+        heapq.heappush(self.heap, (deadline, self.generation, seq_num))
+
+    def cancel_timer(self, seq_num):
+        self.live_timers.pop(seq_num, None)
+
+    def is_timer_running(self, seq_num):
+        return seq_num in self.live_timers
+
+    def drop_stale_timers(self):
+        while len(self.heap) != 0 and self.live_timers.get(self.heap[0][2]) != self.heap[0][1]:
+            heapq.heappop(self.heap)
+
+    def get_next_deadline(self):
+        # None when no timer is running
+        self.drop_stale_timers()
+        if len(self.heap) == 0:
+            return None
+        return self.heap[0][0]
+
+    def pop_expired_timers(self, now):
+        expired = []
+        self.drop_stale_timers()
+        while len(self.heap) != 0 and self.heap[0][0] <= now:
+            _, _, seq_num = heapq.heappop(self.heap)
+            del self.live_timers[seq_num]
+            expired.append(seq_num)
+            self.drop_stale_timers()
+        return expired
@@ -0,0 +1,47 @@
+"""
+Converts a binary trace written with --trace back into the text logs.
+A sender trace gives seqnum.log, ack.log and N.log, in the same format as the loggers.
+An nEmulator trace gives emulator.log, with one "t=<ns> <event> <packet type> <seqnum> <delay ms>" line per record.
+"""
+import argparse
+import os
+
+from constants import SACK, DATA, EOT, RESUME, COMPRESSED
+from event_trace import read_trace, EVENT_SENT, EVENT_ACK, EVENT_WINDOW, EVENT_DROP, EVENT_DELAY, EVENT_FORWARD
+from logger import LoggerTimeStamped
+
+EMULATOR_EVENT_NAMES = {EVENT_DROP: "DROP", EVENT_DELAY: "DELAY", EVENT_FORWARD: "FORWARD"}
+PACKET_TYPE_NAMES = {SACK: "SACK", DATA: "DATA", EOT: "EOT", RESUME: "RESUME", DATA | COMPRESSED: "DATA"}
+
+
+def convert_trace(trace_filename, output_dir="."):
+    loggers = {}
+
+    def get_logger(name):
+        if name not in loggers:
+            loggers[name] = LoggerTimeStamped(os.path.join(output_dir, name))
+        return loggers[name]
+
+    for timestamp, event, packet_type, seqnum, value in read_trace(trace_filename):
+        if event == EVENT_WINDOW:
+            get_logger("N").log(timestamp, value)
+        elif event == EVENT_SENT or event == EVENT_ACK:
+            message = "EOT" if packet_type == EOT else seqnum
+            get_logger("seqnum" if event == EVENT_SENT else "ack").log(timestamp, message)
+        elif event in EMULATOR_EVENT_NAMES:
+            get_logger("emulator").log(timestamp, f"{EMULATOR_EVENT_NAMES[event]} "
+                                                  f"{PACKET_TYPE_NAMES.get(packet_type, packet_type)} {seqnum} {value}")
+        else:
+            raise RuntimeError(f"Unknown event {event} in {trace_filename}")
+
+    for logger in loggers.values():
+        logger.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="convert a binary RDT trace into text logs")
+    parser.add_argument(dest="trace", type=str, help="trace written by send.py or network_emulator.py --trace")
+    parser.add_argument("--output_dir", type=str, default=".", help="directory of the text logs")
+    args = parser.parse_args()
+
+    convert_trace(args.trace, args.output_dir)
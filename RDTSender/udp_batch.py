@@ -0,0 +1,151 @@
+"""
+Sends and receives many UDP datagrams per system call.
+On Linux, BatchSender uses sendmmsg(2) and BatchReceiver uses recvmmsg(2) through ctypes;
+elsewhere they fall back to one sendto or recv per datagram. Only IPv4 is supported, like the rest of the sender.
+The ctypes structures are allocated once per socket and reused for every batch.
+"""
+import ctypes
+import ctypes.util
+import errno
+import socket
+import sys
+
+
+class iovec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class msghdr(ctypes.Structure):
+    _fields_ = [("msg_name", ctypes.c_void_p), ("msg_namelen", ctypes.c_uint32),
+                ("msg_iov", ctypes.POINTER(iovec)), ("msg_iovlen", ctypes.c_size_t),
+                ("msg_control", ctypes.c_void_p), ("msg_controllen", ctypes.c_size_t),
+                ("msg_flags", ctypes.c_int)]
+
+
+class mmsghdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", msghdr), ("msg_len", ctypes.c_uint)]
+
+
+class sockaddr_in(ctypes.Structure):
+    _fields_ = [("sin_family", ctypes.c_ushort), ("sin_port", ctypes.c_uint16), ("sin_addr", ctypes.c_uint8 * 4),
+                ("sin_zero", ctypes.c_uint8 * 8)]
+
+
+def load_libc_function(name, argtypes):
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        function = getattr(ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True), name)
+    except (OSError, AttributeError):
+        return None
+    function.argtypes = argtypes
+    function.restype = ctypes.c_int
+    return function
+
+
+libc_sendmmsg = load_libc_function("sendmmsg", [ctypes.c_int, ctypes.POINTER(mmsghdr), ctypes.c_uint, ctypes.c_int])
+libc_recvmmsg = load_libc_function("recvmmsg", [ctypes.c_int, ctypes.POINTER(mmsghdr), ctypes.c_uint, ctypes.c_int,
+                                                ctypes.c_void_p])
+
+
+def get_messages_from(messages, index):
+    return ctypes.cast(ctypes.addressof(messages) + index * ctypes.sizeof(mmsghdr), ctypes.POINTER(mmsghdr))
+
+
+def raise_errno():
+    error = ctypes.get_errno()
+    raise OSError(error, errno.errorcode.get(error, "unknown error"))
+
+
+class BatchSender:
+    """
+    Sends lists of datagrams to one address, at most batch_size per system call.
+    """
+
+    def __init__(self, sock, address, batch_size):
+        self.sock = sock
+        self.address = address
+        self.batch_size = batch_size
+        if libc_sendmmsg is None:
+            return
+        host, port = address
+        self.sockaddr = sockaddr_in()
+        self.sockaddr.sin_family = socket.AF_INET
+        self.sockaddr.sin_port = socket.htons(port)
+        self.sockaddr.sin_addr[:] = socket.inet_aton(socket.gethostbyname(host))
+        self.vectors = (iovec * batch_size)()
+        self.messages = (mmsghdr * batch_size)()
+        for i in range(batch_size):
+            header = self.messages[i].msg_hdr
+            header.msg_name = ctypes.addressof(self.sockaddr)
+            header.msg_namelen = ctypes.sizeof(self.sockaddr)
+            header.msg_iov = ctypes.pointer(self.vectors[i])
+            header.msg_iovlen = 1
+
+    def send(self, buffers):
+        if libc_sendmmsg is None:
+            for buffer in buffers:
+                self.sock.sendto(buffer, self.address)
+            return
+        for start in range(0, len(buffers), self.batch_size):
+            batch = buffers[start:start + self.batch_size]
+            for i, buffer in enumerate(batch):
+                # the buffers are bytes, kept alive by the caller until the call returns
+                self.vectors[i].iov_base = ctypes.cast(ctypes.c_char_p(buffer), ctypes.c_void_p)
+                self.vectors[i].iov_len = len(buffer)
+            sent = 0
+            while sent < len(batch):
+                result = libc_sendmmsg(self.sock.fileno(), get_messages_from(self.messages, sent), len(batch) - sent, 0)
+                if result < 0:
+                    if ctypes.get_errno() == errno.EINTR:
+                        continue
+                    raise_errno()
+                sent += result
+
+
+class BatchReceiver:
+    """
+    Receives every datagram already waiting on the socket without blocking, at most batch_size per system call.
+    """
+
+    def __init__(self, sock, batch_size, buffer_len):
+        self.sock = sock
+        self.batch_size = batch_size
+        self.buffer_len = buffer_len
+        if libc_recvmmsg is None:
+            return
+        self.buffers = [ctypes.create_string_buffer(buffer_len) for _ in range(batch_size)]
+        self.vectors = (iovec * batch_size)()
+        self.messages = (mmsghdr * batch_size)()
+        for i in range(batch_size):
+            self.vectors[i].iov_base = ctypes.cast(self.buffers[i], ctypes.c_void_p)
+            self.vectors[i].iov_len = buffer_len
+            self.messages[i].msg_hdr.msg_iov = ctypes.pointer(self.vectors[i])
+            self.messages[i].msg_hdr.msg_iovlen = 1
+
+    def receive(self):
+        if libc_recvmmsg is None:
+            return self.receive_one_by_one()
+        received = []
+        while True:
+            result = libc_recvmmsg(self.sock.fileno(), get_messages_from(self.messages, 0), self.batch_size,
+                                   socket.MSG_DONTWAIT, None)
+            if result < 0:
+                error = ctypes.get_errno()
+                if error == errno.EINTR:
+                    continue
+                if error in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return received
+                raise_errno()
+            for i in range(result):
+                received.append(ctypes.string_at(self.buffers[i], self.messages[i].msg_len))
+            if result < self.batch_size:
+                return received
+
+    def receive_one_by_one(self):
+        received = []
+        while True:
+            try:
+                received.append(self.sock.recv(self.buffer_len, socket.MSG_DONTWAIT))
+            except BlockingIOError:
+                return received
@@ -0,0 +1,46 @@
+"""
+Writes the emulator's drop, delay and forward decisions as a compact binary trace.
+The layout is the one of RDTSender/event_trace.py, whose trace_converter.py turns it into text:
+    header: magic b"RDTTRACE", version (uint32), record size (uint32)
+    record: timestamp in ns (int64), event (uint8), packet type (uint8), padding, seqnum (int32), delay in ms (uint32)
+"""
+import struct
+import threading
+import time
+
+TRACE_MAGIC = b"RDTTRACE"
+TRACE_VERSION = 1
+TRACE_HEADER = struct.Struct('<8sII')
+TRACE_RECORD = struct.Struct('<qBB2xiI')
+TRACE_BUFFER_BYTE_LEN = 65536
+
+EVENT_DROP = 10
+EVENT_DELAY = 11
+EVENT_FORWARD = 12
+
+
+class TraceWriter:
+    def __init__(self, filename):
+        self.file = open(filename, "wb")
+        self.file.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, TRACE_RECORD.size))
+        self.buffer = bytearray(TRACE_BUFFER_BYTE_LEN - TRACE_BUFFER_BYTE_LEN % TRACE_RECORD.size)
+        self.offset = 0
+        self.lock = threading.Lock()
+
+    def write(self, event, packet_type, seqnum, delay=0):
+        with self.lock:
+            if self.offset == len(self.buffer):
+                self.write_buffer()
+            TRACE_RECORD.pack_into(self.buffer, self.offset, time.time_ns(), event, packet_type, seqnum, delay)
+            self.offset += TRACE_RECORD.size
+
+    def write_buffer(self):
+        if self.offset != 0:
+            self.file.write(memoryview(self.buffer)[:self.offset])
+            self.file.flush()
+        self.offset = 0
+
+    def flush(self):
+        # the emulator never exits on its own, so it flushes at the end of every transfer
+        with self.lock:
+            self.write_buffer()
@@ -0,0 +1,100 @@
+"""
+The model of one direction of the emulated link.
+For every packet it decides whether the packet is lost and how long each copy of it is delayed:
+    1. a bottleneck of `rate` bytes per second with a FIFO queue of `queue_size` packets, full queue -> tail drop;
+    2. random loss, either independent or bursty with a Gilbert-Elliott channel;
+    3. a propagation delay drawn from `delay_distribution`, between 0 and max_delay;
+    4. with probability `duplicate`, a second copy with its own propagation delay.
+All the randomness comes from `rng`, so a seeded random.Random gives the same decisions every run.
+Without the optional features, the decisions are those of the original emulator.
+"""
+from collections import deque
+
+DELAY_DISTRIBUTIONS = ["uniform", "normal", "exponential", "constant"]
+
+
+class LinkModel:
+    """
+    :param rng a random.Random, or the random module itself
+    :param max_delay in milliseconds
+    :param prob_discard the loss probability, in the good state when burst_loss is given
+    :param rate the bottleneck rate in bytes per second, None for no bottleneck
+    :param queue_size the number of packets waiting for the bottleneck, None for an unlimited queue
+    :param burst_loss (P(good -> bad), P(bad -> good), loss probability in the bad state), or None
+    :param reorder False to never let a packet leave before the one received before it
+    """
+
+    def __init__(self, rng, max_delay, prob_discard, rate=None, queue_size=None, burst_loss=None,
+                 delay_distribution="uniform", duplicate=0.0, reorder=True):
+        if delay_distribution not in DELAY_DISTRIBUTIONS:
+            raise RuntimeError(f"Unknown delay distribution: {delay_distribution}, should be one of {DELAY_DISTRIBUTIONS}")
+        self.rng = rng
+        self.max_delay = max_delay
+        self.prob_discard = prob_discard
+        self.rate = rate
+        self.queue_size = queue_size
+        self.burst_loss = burst_loss
+        self.delay_distribution = delay_distribution
+        self.duplicate = duplicate
+        self.reorder = reorder
+        self.in_bad_state = False
+        self.departure_times = deque()  # of the packets in the bottleneck queue, in seconds
+        self.last_arrival = 0.0  # of the latest packet at the far end, in seconds
+
+    def get_delays(self, now, packet_len):
+        """
+        :param now the arrival time in seconds, from time.monotonic()
+        Returns the delay in milliseconds of each copy of the packet to forward, an empty list if it is lost.
+        """
+        queueing_delay = 0.0
+        if self.rate is not None:
+            queueing_delay = self.enqueue(now, packet_len)
+            if queueing_delay is None:
+                return []  # tail drop
+        if self.is_lost():
+            return []
+        delays = [queueing_delay + self.get_propagation_delay()]
+        if self.duplicate > 0 and self.rng.random() < self.duplicate:
+            delays.append(queueing_delay + self.get_propagation_delay())
+        if not self.reorder:
+            delays = [self.keep_order(now, delay) for delay in delays]
+        return delays
+
+    def enqueue(self, now, packet_len):
+        # returns the time spent waiting for and going through the bottleneck in ms, None if the queue is full
+        while len(self.departure_times) != 0 and self.departure_times[0] <= now:
+            self.departure_times.popleft()
+        if self.queue_size is not None and len(self.departure_times) >= self.queue_size:
+            return None
+        start = self.departure_times[-1] if len(self.departure_times) != 0 else now
+        departure = start + packet_len / self.rate
+        self.departure_times.append(departure)
+        return (departure - now) * 1000.0
+
+    def is_lost(self):
+        if self.burst_loss is None:
+            return self.rng.random() < self.prob_discard
+        good_to_bad, bad_to_good, bad_loss = self.burst_loss
+        if self.in_bad_state:
+            self.in_bad_state = self.rng.random() >= bad_to_good
+        else:
+            self.in_bad_state = self.rng.random() < good_to_bad
+        return self.rng.random() < (bad_loss if self.in_bad_state else self.prob_discard)
+
+    def get_propagation_delay(self):
+        if self.delay_distribution == "uniform":
+            return self.rng.randint(0, self.max_delay)
+        if self.delay_distribution == "constant":
+            return self.max_delay
+        if self.delay_distribution == "normal":
+            # centred in the range, which holds +-3 standard deviations
+            delay = self.rng.gauss(self.max_delay / 2, self.max_delay / 6)
+        else:
+            # mostly short delays with a long tail, mean of a quarter of the range
+            delay = self.rng.expovariate(4 / self.max_delay) if self.max_delay > 0 else 0
+        return min(max(delay, 0), self.max_delay)
+
+    def keep_order(self, now, delay):
+        arrival = max(now + delay / 1000.0, self.last_arrival)
+        self.last_arrival = arrival
+        return (arrival - now) * 1000.0
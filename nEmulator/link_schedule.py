@@ -0,0 +1,58 @@
+"""
+Records the loss and delay decisions of the links to a file, and replays them later,
+so that two versions of the sender can be measured under the same network conditions.
+The file has one line per packet, in the order the packets reached the emulator:
+    "F 12 40.5" a packet from the RDTSender, forwarded twice, after 12 ms and 40.5 ms
+    "B"         a packet from the RDTReceiverwithQueue, dropped
+The decisions of each direction are replayed in order, whatever the packet is.
+"""
+from collections import deque
+
+FORWARD = "F"
+BACKWARD = "B"
+
+
+class RecordingLink:
+    """
+    Takes the place of a LinkModel and writes each of its decisions to record_file.
+    """
+
+    def __init__(self, link, record_file, direction):
+        self.link = link
+        self.record_file = record_file
+        self.direction = direction
+
+    def get_delays(self, now, packet_len):
+        delays = self.link.get_delays(now, packet_len)
+        self.record_file.write(" ".join([self.direction] + [repr(delay) for delay in delays]) + "\n")
+        return delays
+
+
+class ReplayedLink:
+    """
+    Takes the place of a LinkModel and returns the recorded decisions of its direction, in order.
+    Once they are used up, e.g. because the sender now needs more retransmissions, the fallback link decides.
+    """
+
+    def __init__(self, decisions, fallback_link):
+        self.decisions = deque(decisions)
+        self.fallback_link = fallback_link
+
+    def get_delays(self, now, packet_len):
+        if len(self.decisions) == 0:
+            return self.fallback_link.get_delays(now, packet_len)
+        return self.decisions.popleft()
+
+
+def read_schedule(filename):
+    """
+    Returns the recorded decisions as a dictionary from the direction to the list of delays of each packet.
+    """
+    decisions = {FORWARD: [], BACKWARD: []}
+    with open(filename) as file:
+        for line_number, line in enumerate(file, 1):
+            fields = line.split()
+            if len(fields) == 0 or fields[0] not in decisions:
+                raise RuntimeError(f"{filename}:{line_number} is not a recorded decision: {line!r}")
+            decisions[fields[0]].append([float(delay) for delay in fields[1:]])
+    return decisions
@@ -1,11 +1,16 @@
+import heapq
+import itertools
 import random
+import selectors
 import time
-from queue import Queue
-import threading
 import argparse
 import socket
 
+from link_model import LinkModel, DELAY_DISTRIBUTIONS
+from link_schedule import RecordingLink, ReplayedLink, read_schedule, FORWARD, BACKWARD
 from packet import Packet
+from udp_batch import send_batch
+from event_trace import TraceWriter, EVENT_DROP, EVENT_DELAY, EVENT_FORWARD
 
 # initialize to dumby values for sanity checking purposes
 max_delay = None  # max delay a packet can be delayed by in milliseconds
@@ -21,39 +26,70 @@ sender_recv_port = None  # the RDTSender's receiving UDP port number
 
 prob_discard = None  # the probability a packet is discarded
 
+# the LinkModel of each direction, decides on the loss and delay of the packets
+forward_link = None
+backward_link = None
+record_file = None  # the decisions of both links are written to it with --record
+
 verbose = False
 
-data_buff = Queue()
-ack_buff = Queue()
+trace_writer = None  # records the drop, delay and forward decisions when --trace is given
+
+
+class InFlightPackets:
+    """
+    Counts the delayed packets of one direction that were not forwarded yet,
+    and runs the callbacks waiting for the direction to be empty as soon as the last one leaves.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.waiting = []
+
+    def add(self):
+        self.count += 1
+
+    def remove(self):
+        self.count -= 1
+        if self.count == 0:
+            callbacks, self.waiting = self.waiting, []
+            for callback in callbacks:
+                callback()
+
+    def when_empty(self, callback):
+        if self.count == 0:
+            callback()
+        else:
+            self.waiting.append(callback)
+
+
+data_in_flight = InFlightPackets()  # delayed packets from the RDTSender
+ack_in_flight = InFlightPackets()  # delayed packets from the RDTReceiverwithQueue
+
+SOCKET_BUFFER_BYTE_LEN = 4 * 1024 * 1024  # absorbs bursts of packets in both directions
+
+pending_forwards = []  # heap of (due time, schedule order, callback, args)
+schedule_order = itertools.count()
+
+# packets due in the current turn of the event loop, sent in one batch per direction
+to_receiver = []
+to_sender = []
 
 
 def processPacket(packet, fromSender):
-    global prob_discard
     if not isinstance(packet, bytes):
         raise RuntimeError("processPacket can only process a packet encoded as bytes")
     recvd_packet = Packet(packet)
     typ, seqnum, length, data = recvd_packet.decode()
+    if verbose: data = bytes(data)  # the payload is a memoryview into packet
     if verbose: print(
         "Packet being processed: Type={}, seqnum={}, length={}, data={}".format(typ, seqnum, length, data))
     if typ == 2:  # if type == EOT
-        if fromSender:
-            while not data_buff.empty():
-                # delay for longest possible delay and check again.
-                delayThread(max_delay)
-            if verbose: print(
-                "Sending packet: Type={}, seqnum={}, length={}, data={}".format(typ, seqnum, length, data))
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.sendto(packet, (receiver_addr, receiver_recv_port))
-        else:
-            while not ack_buff.empty():
-                # delay for longest possible delay and check again.
-                delayThread(max_delay)
-            if verbose: print(
-                "Sending packet: Type={}, seqnum={}, length={}, data={}".format(typ, seqnum, length, data))
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.sendto(packet, (sender_addr, sender_recv_port))
+        # the EOT is not delayed, but waits for the packets still in flight in its direction
+        (data_in_flight if fromSender else ack_in_flight).when_empty(lambda: forwardEOT(packet, fromSender))
     else:
-        if not randomTrue(prob_discard):
+        delays = (forward_link if fromSender else backward_link).get_delays(time.monotonic(), len(packet))
+        if len(delays) != 0:
             # process packet
             if fromSender:
                 if typ == 0:
@@ -62,61 +98,138 @@ def processPacket(packet, fromSender):
                 if verbose: print(
                     "Adding packet to data buffer: Type={}, seqnum={}, length={}, data={}".format(typ, seqnum, length,
                                                                                                   data))
-                data_buff.put(packet)
+                in_flight = data_in_flight
             else:
                 if typ == 1:
                     raise RuntimeError("Received data from the RDTReceiverwithQueue")
                 if verbose: print(
                     "Adding packet to ack buffer: Type={}, seqnum={}, length={}, data={}".format(typ, seqnum, length,
                                                                                                  data))
-                ack_buff.put(packet)
-            delay = random.randint(0, max_delay)
-            delayThread(delay)
-            if fromSender:
-                data_buff.get(block=False)
-            else:
-                ack_buff.get(block=False)
-            if verbose: print(
-                "Sending packet: Type={}, seqnum={}, length={}, data={}".format(typ, seqnum, length, data))
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            if fromSender:
-                s.sendto(packet, (receiver_addr, receiver_recv_port))
-            else:
-                s.sendto(packet, (sender_addr, sender_recv_port))
+                in_flight = ack_in_flight
+            # more than one delay when the packet is duplicated
+            for delay in delays:
+                in_flight.add()
+                if trace_writer is not None:
+                    trace_writer.write(EVENT_DELAY, typ, seqnum, round(delay))
+                if verbose: print("Packet delayed by {} milliseconds".format(delay))
+                schedule(delay, forwardPacket, packet, fromSender, typ, seqnum, delay)
         else:
+            if trace_writer is not None:
+                trace_writer.write(EVENT_DROP, typ, seqnum)
             if verbose: print(
                 "Dropped packet: Type={}, seqnum={}, length={}, data={}".format(typ, seqnum, length, data))
 
 
-def forwardFlow():
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.bind(('', forward_recv_port))
-    while True:
-        packet = sock.recv(1024)
-        if verbose: print("Received a packet from from RDTSender")
-        new_thread = threading.Thread(target=processPacket, args=(packet, True,))
-        new_thread.start()
+def forwardPacket(packet, fromSender, typ, seqnum, delay):
+    if verbose: print("Sending packet: Type={}, seqnum={}".format(typ, seqnum))
+    if fromSender:
+        to_receiver.append((packet, (receiver_addr, receiver_recv_port)))
+    else:
+        to_sender.append((packet, (sender_addr, sender_recv_port)))
+    if trace_writer is not None:
+        trace_writer.write(EVENT_FORWARD, typ, seqnum, round(delay))
+    # after the packet, so that a waiting EOT is sent behind it
+    if fromSender:
+        data_in_flight.remove()
+    else:
+        ack_in_flight.remove()
+
+
+def forwardEOT(packet, fromSender):
+    if verbose: print("Sending packet: Type=2")
+    if fromSender:
+        to_receiver.append((packet, (receiver_addr, receiver_recv_port)))
+        if trace_writer is not None:
+            trace_writer.write(EVENT_FORWARD, 2, 0)
+    else:
+        to_sender.append((packet, (sender_addr, sender_recv_port)))
+        if trace_writer is not None:
+            # the EOT from the receiver ends the transfer
+            trace_writer.write(EVENT_FORWARD, 2, 0)
+            trace_writer.flush()
+        if record_file is not None:
+            record_file.flush()
 
 
-def backwardFlow():
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.bind(('', backward_recv_port))
+def schedule(delay, callback, *args):
+    # delay in milliseconds; callbacks due at the same time run in the order they were scheduled
+    heapq.heappush(pending_forwards, (time.monotonic() + delay / 1000.0, next(schedule_order), callback, args))
+
+
+def forwardDuePackets(now):
+    # runs the scheduled forwards whose delay is over, in the order they are due
+    while len(pending_forwards) != 0 and pending_forwards[0][0] <= now:
+        _, _, callback, args = heapq.heappop(pending_forwards)
+        callback(*args)
+
+
+def receivePackets(sock, fromSender):
+    # read everything that is waiting, the socket is non-blocking
     while True:
-        packet = sock.recv(1024)
-        if verbose: print("Received a packet from RDTReceiverwithQueue")
-        new_thread = threading.Thread(target=processPacket, args=(packet, False,))
-        new_thread.start()
+        try:
+            packet = sock.recv(1024)
+        except BlockingIOError:
+            return
+        if verbose: print("Received a packet from " + ("RDTSender" if fromSender else "RDTReceiverwithQueue"))
+        processPacket(packet, fromSender)
+
 
+def sendOutgoing(sock, outgoing):
+    # What does not fit in the socket buffer stays queued in order, to be sent once the socket is writable again:
+    # nothing retransmits a dropped EOT. A datagram that cannot be sent at all is dropped on its own.
+    if len(outgoing) == 0:
+        return
+    handled = send_batch(sock, outgoing, onSendError)
+    if verbose and handled < len(outgoing):
+        print("{} packets wait for the socket buffer".format(len(outgoing) - handled))
+    del outgoing[:handled]
 
-def delayThread(delay):
-    # need to convert milliseconds to seconds for time.sleep()
-    s_delay = delay / 1000.0
-    if verbose: print("Packet delayed by {} milliseconds".format(delay))
-    time.sleep(s_delay)
 
+def onSendError(datagram, error):
+    _, address = datagram
+    print("Could not send a packet to {}: {}".format(address, error))
 
-def randomTrue(probability):
-    return random.random() < probability
+
+def watchWritable(selector, sock, outgoing):
+    # wake up as soon as a socket with packets waiting can take more
+    key = selector.get_key(sock)
+    events = selectors.EVENT_READ | (selectors.EVENT_WRITE if len(outgoing) != 0 else 0)
+    if key.events != events:
+        selector.modify(sock, events, key.data)
+
+
+def runEmulator():
+    """
+    A single-threaded event loop: waits on both receiving sockets until the next pending forward is due,
+    processes what arrived, then forwards every packet whose delay is over.
+    Packets to the receiver leave through the backward socket and packets to the sender through the forward one,
+    so the emulator uses these two sockets only.
+    """
+    forward_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    forward_sock.bind(('', forward_recv_port))
+    forward_sock.setblocking(False)
+    forward_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_BYTE_LEN)
+    forward_sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_BYTE_LEN)
+    backward_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    backward_sock.bind(('', backward_recv_port))
+    backward_sock.setblocking(False)
+    backward_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_BYTE_LEN)
+    backward_sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_BYTE_LEN)
+    selector = selectors.DefaultSelector()
+    selector.register(forward_sock, selectors.EVENT_READ, True)
+    selector.register(backward_sock, selectors.EVENT_READ, False)
+    while True:
+        timeout = None
+        if len(pending_forwards) != 0:
+            timeout = max(0.0, pending_forwards[0][0] - time.monotonic())
+        for key, events in selector.select(timeout):
+            if events & selectors.EVENT_READ:
+                receivePackets(key.fileobj, key.data)
+        forwardDuePackets(time.monotonic())
+        sendOutgoing(backward_sock, to_receiver)
+        sendOutgoing(forward_sock, to_sender)
+        watchWritable(selector, backward_sock, to_receiver)
+        watchWritable(selector, forward_sock, to_sender)
 
 
 if __name__ == '__main__':
@@ -133,31 +246,73 @@ if __name__ == '__main__':
     parser.add_argument("<Maximum Delay>", help="maximum delay of the link in units of millisecond")
     parser.add_argument("<drop probability>", help="packet discard probability")
     parser.add_argument('<verbose>', nargs='?', default=0)
+    parser.add_argument("--rate", type=float, default=None,
+                        help="bandwidth of the link in each direction in kilobits per second, unlimited by default")
+    parser.add_argument("--queue_size", type=int, default=None,
+                        help="number of packets the queue in front of the --rate bottleneck holds "
+                             "before dropping new ones, unlimited by default")
+    parser.add_argument("--burst_loss", type=float, nargs=3, default=None,
+                        metavar=("P_GOOD_TO_BAD", "P_BAD_TO_GOOD", "BAD_DROP_PROBABILITY"),
+                        help="Gilbert-Elliott bursty loss: per-packet probabilities of switching state and the drop "
+                             "probability in the bad state; <drop probability> applies in the good state")
+    parser.add_argument("--delay_distribution", choices=DELAY_DISTRIBUTIONS, default="uniform",
+                        help="distribution of the delay between 0 and <Maximum Delay>")
+    parser.add_argument("--duplicate", type=float, default=0.0,
+                        help="probability that a packet is forwarded twice")
+    parser.add_argument("--no_reordering", action="store_true",
+                        help="never let a packet overtake one received before it")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed of the loss and delay decisions, a random one is chosen and printed by default")
+    schedule_group = parser.add_mutually_exclusive_group()
+    schedule_group.add_argument("--record", type=str, default=None,
+                                help="write the loss and delay decision of every packet to this file")
+    schedule_group.add_argument("--replay", type=str, default=None,
+                                help="take the loss and delay decisions from a file written with --record, "
+                                     "then from the seeded link once they are used up")
+    parser.add_argument("--trace", type=str, default=None,
+                        help="write the drop, delay and forward decisions to this binary trace file, "
+                             "see RDTSender/trace_converter.py")
     args = parser.parse_args()
     # set up sockets to be listening on
     args = args.__dict__  # A LAZY FIX
     max_delay = int(args["<Maximum Delay>"])
     forward_recv_port = int(args["<Forward receiving port>"])
     backward_recv_port = int(args["<Backward receiving port>"])
-    receiver_addr = str(args["<Receiver's network address>"])
+    receiver_addr = socket.gethostbyname(str(args["<Receiver's network address>"]))
     receiver_recv_port = int(args["<Reciever’s receiving UDP port number>"])
-    sender_addr = str(args["<Sender's network address>"])
+    sender_addr = socket.gethostbyname(str(args["<Sender's network address>"]))
     sender_recv_port = int(args["<Sender's receiving UDP port number>"])
     prob_discard = float(args["<drop probability>"])
     if prob_discard < 0 or prob_discard > 1:
         raise RuntimeError("Probability of discarding a packet should be between 0 and 1")
 
     verbose = (1 == int(args["<verbose>"]))
+    if args["queue_size"] is not None and args["rate"] is None:
+        raise RuntimeError("--queue_size needs a --rate")
+    for probability in [args["duplicate"]] + (args["burst_loss"] or []):
+        if probability < 0 or probability > 1:
+            raise RuntimeError("Probabilities should be between 0 and 1")
+    link_options = dict(rate=args["rate"] * 1000 / 8 if args["rate"] is not None else None,
+                        queue_size=args["queue_size"], burst_loss=args["burst_loss"],
+                        delay_distribution=args["delay_distribution"], duplicate=args["duplicate"],
+                        reorder=not args["no_reordering"])
+    seed = args["seed"]
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+        print("Using seed {}".format(seed))
+    # one generator per direction, so that the decisions of one do not depend on the traffic of the other
+    forward_link = LinkModel(random.Random(2 * seed), max_delay, prob_discard, **link_options)
+    backward_link = LinkModel(random.Random(2 * seed + 1), max_delay, prob_discard, **link_options)
+    if args["record"] is not None:
+        record_file = open(args["record"], "w")
+        forward_link = RecordingLink(forward_link, record_file, FORWARD)
+        backward_link = RecordingLink(backward_link, record_file, BACKWARD)
+    elif args["replay"] is not None:
+        decisions = read_schedule(args["replay"])
+        forward_link = ReplayedLink(decisions[FORWARD], forward_link)
+        backward_link = ReplayedLink(decisions[BACKWARD], backward_link)
+    if args["trace"] is not None:
+        trace_writer = TraceWriter(args["trace"])
 
-    # start a thread for both forward and backword network flow
-    forwardThread = threading.Thread(target=forwardFlow)
-    backwardThread = threading.Thread(target=backwardFlow)
     if verbose: print("Starting network emulator, and waiting to receiver something...")
-    forwardThread.start()
-    backwardThread.start()
-    while not forwardThread.is_alive():
-        pass
-    forwardThread.join()
-    while not backwardThread.is_alive():
-        pass
-    backwardThread.join()
+    runEmulator()
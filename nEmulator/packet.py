@@ -1,6 +1,11 @@
 # Packet definition for CS 456/656 Winter 2021 Assignment 2
 import struct
 
+HEADER_BYTE_LEN = 12
+PAY_LOAD_BYTE_LEN = 500
+# type, seqnum, length in network byte order
+HEADER = struct.Struct('!iii')
+
 
 class Packet:
     """
@@ -10,34 +15,40 @@ class Packet:
                 type - the type of packet, 0 = ACK, 1 = data, 2 = EOT
                 seqnum - the seqeunce number mod 32
                 length - the length of data AT MOST 500
-                data - the data being sent
+                data - the data being sent, as bytes
         Construction by encoded Packet
             Packet(encoded_packet)
-                encoded_packet - a packet encoded as a bytes object
+                encoded_packet - a packet encoded as a bytes-like object
+                data is then a memoryview into encoded_packet, no payload bytes are copied
     """
 
     def __init__(self, *args):
         if len(args) == 1:
-            if not isinstance(args[0], bytes):
+            if not isinstance(args[0], (bytes, bytearray, memoryview)):
                 raise RuntimeError("Received one argument and expect bytes. Got={}\n".format(type(args[0])))
-            self.typ, self.seqnum, self.length, self.data = struct.unpack('!iii{}s'.format(len(args[0]) - 12), args[0])
-            _, _, _, self.data = struct.unpack('!iii{}s'.format(self.length), args[0])
-            self.data = self.data.decode('ASCII')[0:self.length]
+            self.typ, self.seqnum, self.length = HEADER.unpack_from(args[0])
+            self.data = memoryview(args[0])[HEADER_BYTE_LEN:HEADER_BYTE_LEN + self.length]
+            self.encoded = args[0]
         else:
-            if len(args[3]) > 500:
-                raise RuntimeError("messages to be sent should be at most 500 characters long")
+            if not isinstance(args[3], (bytes, bytearray, memoryview)):
+                raise RuntimeError("Packet data should be bytes. Got={}\n".format(type(args[3])))
+            if len(args[3]) > PAY_LOAD_BYTE_LEN:
+                raise RuntimeError("messages to be sent should be at most 500 bytes long")
             self.typ = int(args[0])
             self.seqnum = int(args[1])
             self.length = int(args[2])
             self.data = args[3]
+            self.encoded = None
 
     """
         Returns self encoded as a bytes object to be sent over the network
+        The encoding is cached, so retransmissions do not encode the packet again
     """
 
     def encode(self):
-        encoded_data = self.data.encode('ASCII')
-        return struct.pack('!iii{}s'.format(self.length), self.typ, self.seqnum, self.length, encoded_data)
+        if self.encoded is None:
+            self.encoded = HEADER.pack(self.typ, self.seqnum, self.length) + self.data[:self.length]
+        return self.encoded
 
     """
         Returns the type, seqnum, length, and data of a packet
@@ -54,12 +65,12 @@ class Packet:
         ret = "Type=" + str(self.typ) + "\n"
         ret += "Seqnum=" + str(self.seqnum) + "\n"
         ret += "Length=" + str(self.length) + "\n"
-        ret += "Data=" + self.data
+        ret += "Data=" + repr(bytes(self.data))
         return ret
 
 
 if __name__ == '__main__':
-    testmsg = "testmsg"
+    testmsg = b"testmsg"
     packet1 = Packet(0, 1, len(testmsg), testmsg)
     print(packet1)
     packet1_enc = packet1.encode()
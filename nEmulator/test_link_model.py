@@ -0,0 +1,45 @@
+import random
+from unittest import TestCase
+
+from link_model import LinkModel
+
+
+class TestLinkModel(TestCase):
+    def test_default_decisions_match_original_emulator(self):
+        link = LinkModel(random.Random(7), 100, 0.2)
+        rng = random.Random(7)
+        for _ in range(1000):
+            expected = [] if rng.random() < 0.2 else [rng.randint(0, 100)]
+            assert link.get_delays(0.0, 512) == expected
+
+    def test_same_seed_same_decisions(self):
+        def decide():
+            link = LinkModel(random.Random(3), 50, 0.01, rate=125000, queue_size=5, burst_loss=(0.1, 0.3, 0.8),
+                             delay_distribution="normal", duplicate=0.1, reorder=False)
+            return [link.get_delays(i * 0.001, 512) for i in range(2000)]
+
+        assert decide() == decide()
+
+    def test_bottleneck_queue(self):
+        # 512 bytes take 4 ms at 128 kB/s
+        link = LinkModel(random.Random(0), 0, 0.0, rate=128000, queue_size=2)
+        assert link.get_delays(0.0, 512) == [4.0]
+        assert link.get_delays(0.0, 512) == [8.0]
+        assert link.get_delays(0.0, 512) == []  # tail drop
+        assert link.get_delays(0.004, 512) == [8.0]
+
+    def test_burst_loss(self):
+        # lost packets come in runs: once bad, the channel stays bad with probability 0.9
+        link = LinkModel(random.Random(1), 0, 0.0, burst_loss=(0.01, 0.1, 1.0))
+        lost = [len(link.get_delays(0.0, 512)) == 0 for _ in range(100000)]
+        runs = sum(1 for i in range(1, len(lost)) if lost[i] and not lost[i - 1])
+        assert sum(lost) / runs > 5
+
+    def test_no_reordering(self):
+        link = LinkModel(random.Random(2), 100, 0.0, duplicate=0.5, reorder=False)
+        arrivals = []
+        for i in range(1000):
+            now = i * 0.001
+            arrivals += [now + delay / 1000.0 for delay in link.get_delays(now, 512)]
+        assert all(arrivals[i] >= arrivals[i - 1] - 1e-9 for i in range(1, len(arrivals)))
+        assert len(arrivals) > 1000
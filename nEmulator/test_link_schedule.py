@@ -0,0 +1,28 @@
+import os
+import random
+import tempfile
+from unittest import TestCase
+
+from link_model import LinkModel
+from link_schedule import RecordingLink, ReplayedLink, read_schedule, FORWARD, BACKWARD
+
+
+class TestLinkSchedule(TestCase):
+    def test_replay_recorded_decisions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "schedule.txt")
+            with open(filename, "w") as record_file:
+                forward_link = RecordingLink(LinkModel(random.Random(0), 100, 0.3, duplicate=0.1), record_file,
+                                             FORWARD)
+                backward_link = RecordingLink(LinkModel(random.Random(1), 100, 0.3, delay_distribution="normal"),
+                                              record_file, BACKWARD)
+                recorded = [(forward_link.get_delays(0.0, 512), backward_link.get_delays(0.0, 12))
+                            for _ in range(500)]
+
+            decisions = read_schedule(filename)
+            # a different seed for what comes after the recording
+            forward_link = ReplayedLink(decisions[FORWARD], LinkModel(random.Random(5), 100, 0.0))
+            backward_link = ReplayedLink(decisions[BACKWARD], LinkModel(random.Random(6), 100, 0.0))
+            replayed = [(forward_link.get_delays(1.0, 512), backward_link.get_delays(1.0, 12)) for _ in range(500)]
+            assert replayed == recorded
+            assert len(forward_link.get_delays(2.0, 512)) == 1
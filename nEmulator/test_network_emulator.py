@@ -0,0 +1,117 @@
+import selectors
+import socket
+from unittest import TestCase
+from unittest.mock import patch
+
+import network_emulator
+from packet import Packet
+
+SACK, DATA, EOT = 0, 1, 2  # the packet types
+
+
+class TestSendOutgoing(TestCase):
+    def test_unsent_packets_wait_for_a_writable_socket(self):
+        outgoing = [(b"data", ("127.0.0.1", 1)), (b"EOT", ("127.0.0.1", 1))]
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock, selectors.DefaultSelector() as selector:
+            selector.register(sock, selectors.EVENT_READ, True)
+            # the socket buffer takes only the first one
+            with patch.object(network_emulator, "send_batch", return_value=1):
+                network_emulator.sendOutgoing(sock, outgoing)
+            assert outgoing == [(b"EOT", ("127.0.0.1", 1))]
+            network_emulator.watchWritable(selector, sock, outgoing)
+            assert selector.get_key(sock).events == selectors.EVENT_READ | selectors.EVENT_WRITE
+            assert selector.get_key(sock).data is True
+            with patch.object(network_emulator, "send_batch", return_value=1):
+                network_emulator.sendOutgoing(sock, outgoing)
+            assert outgoing == []
+            network_emulator.watchWritable(selector, sock, outgoing)
+            assert selector.get_key(sock).events == selectors.EVENT_READ
+
+
+class TestInFlightPackets(TestCase):
+    def test_callback_runs_at_once_when_empty(self):
+        in_flight = network_emulator.InFlightPackets()
+        calls = []
+        in_flight.when_empty(lambda: calls.append("EOT"))
+        assert calls == ["EOT"]
+
+    def test_callbacks_wait_for_the_last_packet(self):
+        in_flight = network_emulator.InFlightPackets()
+        calls = []
+        in_flight.add()
+        in_flight.add()
+        in_flight.when_empty(lambda: calls.append(1))
+        in_flight.when_empty(lambda: calls.append(2))
+        in_flight.remove()
+        assert calls == []
+        in_flight.remove()
+        assert calls == [1, 2]
+        # the callbacks run once, not every time the direction empties again
+        in_flight.add()
+        in_flight.remove()
+        assert calls == [1, 2]
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 0.0
+
+    def monotonic(self):
+        return self.time
+
+
+class FixedDelays:
+    """
+    A link that delays the packets by the given delays in ms, in order; None drops a packet.
+    """
+
+    def __init__(self, delays):
+        self.delays = list(delays)
+
+    def get_delays(self, now, packet_len):
+        delay = self.delays.pop(0)
+        return [] if delay is None else [delay]
+
+
+class TestProcessPacket(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch.multiple(network_emulator, time=self.clock, pending_forwards=[], to_receiver=[],
+                                 to_sender=[], data_in_flight=network_emulator.InFlightPackets(),
+                                 ack_in_flight=network_emulator.InFlightPackets(),
+                                 receiver_addr="127.0.0.1", receiver_recv_port=2, sender_addr="127.0.0.1",
+                                 sender_recv_port=4, forward_link=None, backward_link=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_until(self, time):
+        self.clock.time = time
+        network_emulator.forwardDuePackets(time)
+        return [Packet(packet).seqnum if Packet(packet).typ != EOT else "EOT"
+                for packet, _ in network_emulator.to_receiver]
+
+    def test_packets_forwarded_when_due(self):
+        network_emulator.forward_link = FixedDelays([30, 10, None])
+        for seq_num in range(3):
+            network_emulator.processPacket(Packet(DATA, seq_num, 1, b"x").encode(), True)
+        assert self.run_until(0.005) == []
+        assert self.run_until(0.010) == [1]
+        assert self.run_until(0.030) == [1, 0]
+        assert network_emulator.pending_forwards == []  # the third one was dropped
+
+    def test_EOT_waits_for_the_packets_in_flight(self):
+        network_emulator.forward_link = FixedDelays([30, 10])
+        network_emulator.backward_link = FixedDelays([50])
+        network_emulator.processPacket(Packet(DATA, 0, 1, b"x").encode(), True)
+        network_emulator.processPacket(Packet(DATA, 1, 1, b"x").encode(), True)
+        network_emulator.processPacket(Packet(SACK, 5, 0, b"").encode(), False)
+        network_emulator.processPacket(Packet(EOT, 0, 0, b"").encode(), True)
+        assert self.run_until(0.010) == [1]
+        # queued right behind the last data packet, not behind the ACK of the other direction
+        assert self.run_until(0.030) == [1, 0, "EOT"]
+        assert len(network_emulator.to_sender) == 0
+
+    def test_EOT_forwarded_at_once_when_nothing_is_in_flight(self):
+        network_emulator.processPacket(Packet(EOT, 0, 0, b"").encode(), False)
+        assert network_emulator.to_sender == [(Packet(EOT, 0, 0, b"").encode(), ("127.0.0.1", 4))]
+        assert network_emulator.pending_forwards == []
@@ -0,0 +1,41 @@
+import errno
+import socket
+from unittest import TestCase
+from unittest.mock import patch
+
+import udp_batch
+from udp_batch import send_batch
+
+
+class TestSendBatch(TestCase):
+    def send(self, datagrams):
+        errors = []
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as receiving_socket, \
+                socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sending_socket:
+            receiving_socket.bind(("127.0.0.1", 0))
+            receiving_socket.settimeout(1)
+            address = receiving_socket.getsockname()
+            handled = send_batch(sending_socket, [(data, address) for data in datagrams],
+                                 lambda datagram, error: errors.append((datagram[0], error.errno)))
+            received = [receiving_socket.recv(2048) for _ in range(handled - len(errors))]
+        return handled, received, errors
+
+    def test_error_skips_one_datagram(self):
+        too_long = b"x" * 70000
+        handled, received, errors = self.send([b"a", too_long, b"b"])
+        assert handled == 3
+        assert received == [b"a", b"b"]
+        assert errors == [(too_long, errno.EMSGSIZE)]
+
+    def test_fallback_error_skips_one_datagram(self):
+        with patch.object(udp_batch, "libc_sendmmsg", None):
+            self.test_error_skips_one_datagram()
+
+    def test_full_buffer_keeps_the_rest(self):
+        class FullSocket:
+            def sendto(self, data, address):
+                if data == b"full":
+                    raise BlockingIOError(errno.EAGAIN, "full")
+
+        with patch.object(udp_batch, "libc_sendmmsg", None):
+            assert send_batch(FullSocket(), [(b"a", None), (b"full", None), (b"b", None)]) == 1
@@ -0,0 +1,118 @@
+"""
+Sends many UDP datagrams with one system call.
+On Linux, send_batch uses sendmmsg(2) through ctypes; elsewhere it falls back to one sendto per datagram.
+Only IPv4 destinations are supported, like the rest of the emulator.
+"""
+import ctypes
+import ctypes.util
+import errno
+import socket
+import sys
+
+
+class iovec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class msghdr(ctypes.Structure):
+    _fields_ = [("msg_name", ctypes.c_void_p), ("msg_namelen", ctypes.c_uint32),
+                ("msg_iov", ctypes.POINTER(iovec)), ("msg_iovlen", ctypes.c_size_t),
+                ("msg_control", ctypes.c_void_p), ("msg_controllen", ctypes.c_size_t),
+                ("msg_flags", ctypes.c_int)]
+
+
+class mmsghdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", msghdr), ("msg_len", ctypes.c_uint)]
+
+
+class sockaddr_in(ctypes.Structure):
+    _fields_ = [("sin_family", ctypes.c_ushort), ("sin_port", ctypes.c_uint16), ("sin_addr", ctypes.c_uint8 * 4),
+                ("sin_zero", ctypes.c_uint8 * 8)]
+
+
+def load_sendmmsg():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        sendmmsg = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(mmsghdr), ctypes.c_uint, ctypes.c_int]
+    sendmmsg.restype = ctypes.c_int
+    return sendmmsg
+
+
+libc_sendmmsg = load_sendmmsg()
+sockaddr_cache = {}
+# the socket buffer is full for now, the datagram can be sent once the socket is writable again
+RETRY_ERRORS = (errno.EAGAIN, errno.EWOULDBLOCK, errno.ENOBUFS)
+
+
+def to_sockaddr(address):
+    if address not in sockaddr_cache:
+        host, port = address
+        sockaddr = sockaddr_in()
+        sockaddr.sin_family = socket.AF_INET
+        sockaddr.sin_port = socket.htons(port)
+        sockaddr.sin_addr[:] = socket.inet_aton(host)
+        sockaddr_cache[address] = sockaddr
+    return sockaddr_cache[address]
+
+
+def send_batch(sock, datagrams, on_error=None):
+    """
+    :param datagrams a list of (bytes, (ip, port)), sent in order
+    :param on_error called with the datagram and the OSError of every datagram that cannot be sent at all,
+    which is skipped
+    Returns the number of datagrams sent or skipped from the start of the list; the rest did not fit in the socket
+    buffer of a non-blocking socket and should be sent again once it is writable.
+    """
+    if libc_sendmmsg is None:
+        return send_one_by_one(sock, datagrams, on_error)
+    count = len(datagrams)
+    messages = (mmsghdr * count)()
+    vectors = (iovec * count)()
+    for i, (data, address) in enumerate(datagrams):
+        # the bytes objects stay alive in datagrams until the call returns
+        vectors[i].iov_base = ctypes.cast(ctypes.c_char_p(data), ctypes.c_void_p)
+        vectors[i].iov_len = len(data)
+        sockaddr = to_sockaddr(address)
+        header = messages[i].msg_hdr
+        header.msg_name = ctypes.addressof(sockaddr)
+        header.msg_namelen = ctypes.sizeof(sockaddr)
+        header.msg_iov = ctypes.pointer(vectors[i])
+        header.msg_iovlen = 1
+    sent = 0
+    while sent < count:
+        first = ctypes.cast(ctypes.addressof(messages) + sent * ctypes.sizeof(mmsghdr), ctypes.POINTER(mmsghdr))
+        result = libc_sendmmsg(sock.fileno(), first, count - sent, 0)
+        if result < 0:
+            # the error is the one of the first datagram not sent
+            error = ctypes.get_errno()
+            if error == errno.EINTR:
+                continue
+            if error in RETRY_ERRORS:
+                break
+            if on_error is not None:
+                on_error(datagrams[sent], OSError(error, errno.errorcode.get(error, "sendmmsg failed")))
+            sent += 1
+            continue
+        sent += result
+    return sent
+
+
+def send_one_by_one(sock, datagrams, on_error=None):
+    for sent, datagram in enumerate(datagrams):
+        while True:
+            try:
+                sock.sendto(*datagram)
+            except InterruptedError:
+                continue
+            except OSError as error:
+                if error.errno in RETRY_ERRORS:
+                    return sent
+                if on_error is not None:
+                    on_error(datagram, error)
+            break
+    return len(datagrams)